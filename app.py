@@ -31,11 +31,64 @@ Author: AOF Video Stream Project
 Date: August 2025
 """
 
+import logging
 import os
 import sys
 from flask import Flask
 from src.webapp.app import create_app
-from src.webapp.config import DevelopmentConfig, ProductionConfig
+from src.webapp.config import DevelopmentConfig, ProductionConfig, get_config
+
+
+def create_asgi_app(config=None):
+    """
+    Create the application wrapped as an ASGI callable.
+    
+    Suitable for external ASGI servers, e.g.
+    ``gunicorn -k uvicorn.workers.UvicornWorker --workers 1 'app:create_asgi_app()'``.
+    Keep a single worker: the camera device is owned by one process.
+    
+    Args:
+        config: Configuration class (defaults to the FLASK_ENV configuration)
+        
+    Returns:
+        ASGI application
+    """
+    from src.webapp.asgi import PooledWsgiToAsgi
+    
+    config = config or get_config()
+    app, _ = create_app(config)
+    return PooledWsgiToAsgi(app, config.ASGI_REQUEST_WORKERS, config.ASGI_VIDEO_WORKERS)
+
+
+def run_asgi_server(app, config) -> bool:
+    """
+    Serve the Flask app through Uvicorn's event loop.
+    
+    Args:
+        app: Flask application
+        config: Configuration class
+        
+    Returns:
+        False if uvicorn/asgiref are not installed, True once the server exits
+    """
+    try:
+        import uvicorn
+        from src.webapp.asgi import PooledWsgiToAsgi
+    except ImportError:
+        print("⚠️  uvicorn/asgiref not installed - falling back to the threaded server")
+        return False
+    
+    # loop/http 'auto' pick uvloop and httptools when they are installed
+    uvicorn.run(
+        PooledWsgiToAsgi(app, config.ASGI_REQUEST_WORKERS, config.ASGI_VIDEO_WORKERS),
+        host=config.HOST,
+        port=config.PORT,
+        loop='auto',
+        http='auto',
+        log_level='debug' if config.DEBUG else 'info'
+    )
+    return True
+
 
 def main():
     """Main application entry point."""
@@ -50,6 +103,12 @@ def main():
     else:
         config = DevelopmentConfig
     
+    # Configure logging once for the whole process (library modules don't)
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL, logging.INFO),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    
     app, socketio = create_app(config)
     
     # Print startup information
@@ -72,6 +131,10 @@ def main():
     print("=" * 60)
     
     try:
+        if env == 'production' and config.SERVER_BACKEND == 'uvicorn':
+            if run_asgi_server(app, config):
+                return
+        
         # Start the development server
         app.run(
             host=config.HOST,
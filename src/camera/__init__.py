@@ -4,9 +4,15 @@ Camera module initialization file.
 This module provides camera functionality for the AOF Video Stream project.
 """
 
+import logging
+
 from .camera_manager import CameraManager
-from .device_detector import DeviceDetector
+from .device_detector import DeviceDetector, DeviceInfo
 from .video_capture import VideoCapture
-from .hardware_encoder import HardwareEncoder, get_hardware_encoder, cleanup_hardware_encoder
+from .frame_buffer import FrameRingBuffer
+from .hardware_encoder import HardwareEncoder, get_hardware_encoder, cleanup_hardware_encoder, encode_jpeg
+
+__all__ = ['CameraManager', 'DeviceDetector', 'DeviceInfo', 'VideoCapture', 'FrameRingBuffer', 'HardwareEncoder', 'get_hardware_encoder', 'cleanup_hardware_encoder', 'encode_jpeg']
 
-__all__ = ['CameraManager', 'DeviceDetector', 'VideoCapture', 'HardwareEncoder', 'get_hardware_encoder', 'cleanup_hardware_encoder']
+# Library logging: stay silent unless the application configures handlers
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -5,16 +5,32 @@ This module provides a high-level interface for managing camera operations,
 including device detection, video capture, and camera switching.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
+import threading
+import weakref
 from .device_detector import DeviceDetector
 from .video_capture import VideoCapture
+from .hardware_encoder import encode_jpeg
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _release_capture(capture_holder: List[Optional[VideoCapture]]):
+    """
+    Release the capture held by a CameraManager that was garbage collected.
+    
+    Runs from weakref.finalize, so it must not reference the manager itself.
+    
+    Args:
+        capture_holder: Single-item list holding the manager's current capture
+    """
+    capture = capture_holder[0]
+    capture_holder[0] = None
+    if capture is not None:
+        capture.release()
+
+
 class CameraManager:
     """
     High-level camera management class that coordinates device detection
@@ -23,11 +39,37 @@ class CameraManager:
     
     def __init__(self):
         """Initialize the camera manager."""
+        # The finalizer only sees this holder, so it can release the camera
+        # without keeping the manager alive
+        self._capture_holder: List[Optional[VideoCapture]] = [None]
+        self._finalizer = weakref.finalize(self, _release_capture, self._capture_holder)
+        
         self.device_detector = DeviceDetector()
-        self.current_capture: Optional[VideoCapture] = None
         self.available_devices: List[Dict] = []
         self.current_device_id: Optional[int] = None
         
+        # Snapshot of the capture's device properties (refreshed lazily after changes)
+        self._props_cache: Optional[Dict] = None
+        
+        # Last encoded frame shared by all viewers: (capture, sequence, quality, jpeg)
+        self._jpeg_cache: Optional[Tuple[VideoCapture, int, int, bytes]] = None
+        self._jpeg_lock = threading.Lock()
+        
+    @property
+    def current_capture(self) -> Optional[VideoCapture]:
+        """The active video capture, or None if no camera is initialized."""
+        return self._capture_holder[0]
+    
+    @current_capture.setter
+    def current_capture(self, capture: Optional[VideoCapture]):
+        self._capture_holder[0] = capture
+    
+    def __enter__(self) -> 'CameraManager':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release_camera()
+    
     def scan_devices(self) -> List[Dict]:
         """
         Scan for available camera devices.
@@ -77,8 +119,17 @@ class CameraManager:
                     logger.error(f"Camera device {device_id} is not available")
                     return False
         
-        # Release current capture if any
-        if self.current_capture is not None:
+        # Switch the existing capture to the new device when possible
+        capture = self.current_capture
+        if capture is not None:
+            if capture.reopen(device_id):
+                self.current_device_id = device_id
+                self._jpeg_cache = None
+                self._props_cache = capture.get_camera_properties()
+                logger.info(f"Switched capture to camera device {device_id}")
+                return True
+            
+            # Fall back to a full teardown and re-init
             self.release_camera()
         
         # Initialize new capture
@@ -86,6 +137,7 @@ class CameraManager:
             self.current_capture = VideoCapture(device_id, quick_init=True)
             if self.current_capture.initialize(timeout_ms=1500):  # Shorter timeout
                 self.current_device_id = device_id
+                self._props_cache = self.current_capture.get_camera_properties()
                 logger.info(f"Successfully initialized camera device {device_id}")
                 return True
             else:
@@ -141,6 +193,41 @@ class CameraManager:
         
         return self.current_capture.get_current_frame()
     
+    def get_current_jpeg(self, quality: int = 80) -> Optional[bytes]:
+        """
+        Get the current frame encoded as JPEG.
+        
+        Each captured frame is encoded at most once per quality setting, so
+        any number of viewers polling at the capture rate share one encode.
+        
+        Args:
+            quality (int): JPEG quality (1-100)
+            
+        Returns:
+            Optional[bytes]: JPEG data or None if no frame is available
+        """
+        capture = self.current_capture
+        if capture is None:
+            return None
+        
+        if capture.raw_jpeg:
+            # The camera already delivers JPEG; pass it through as-is
+            return capture.get_current_frame_jpeg(quality)
+        
+        with self._jpeg_lock:
+            sequence, frame = capture.get_latest_frame()
+            if frame is None:
+                return None
+            
+            cache = self._jpeg_cache
+            if cache is not None and cache[0] is capture and cache[1] == sequence and cache[2] == quality:
+                return cache[3]
+            
+            jpeg = encode_jpeg(frame, quality)
+            if jpeg is not None:
+                self._jpeg_cache = (capture, sequence, quality, jpeg)
+            return jpeg
+    
     def read_frame(self):
         """
         Read a single frame from the camera.
@@ -157,13 +244,29 @@ class CameraManager:
         """
         Get properties of the current camera.
         
+        Device properties are read from the driver once and cached until the
+        resolution or FPS changes; only the running/health state is live.
+        
         Returns:
             Dict: Camera properties or empty dict if no camera active
         """
-        if self.current_capture is None:
+        capture = self.current_capture
+        if capture is None:
             return {}
         
-        return self.current_capture.get_camera_properties()
+        # A disconnected capture reports its state without touching the driver
+        if capture.cap is None:
+            return capture.get_camera_properties()
+        
+        if self._props_cache is None:
+            self._props_cache = capture.get_camera_properties()
+        
+        properties = dict(self._props_cache)
+        is_healthy = capture.is_healthy()
+        properties['is_running'] = capture.is_running
+        properties['is_healthy'] = is_healthy
+        properties['status'] = 'healthy' if is_healthy else ('running' if capture.is_running else 'stopped')
+        return properties
     
     def set_resolution(self, width: int, height: int) -> bool:
         """
@@ -180,6 +283,7 @@ class CameraManager:
             logger.error("No camera initialized")
             return False
         
+        self._props_cache = None
         return self.current_capture.set_resolution(width, height)
     
     def set_fps(self, fps: float) -> bool:
@@ -196,6 +300,7 @@ class CameraManager:
             logger.error("No camera initialized")
             return False
         
+        self._props_cache = None
         return self.current_capture.set_fps(fps)
     
     def release_camera(self):
@@ -204,6 +309,8 @@ class CameraManager:
             self.current_capture.release()
             self.current_capture = None
             self.current_device_id = None
+            self._props_cache = None
+            self._jpeg_cache = None
             logger.info("Released camera")
     
     def get_status(self) -> Dict:
@@ -225,53 +332,48 @@ class CameraManager:
             status['camera_properties'] = self.get_camera_properties()
         
         return status
-    
-    def __del__(self):
-        """Destructor to ensure proper cleanup."""
-        self.release_camera()
+
 
 
 def test_camera_manager():
     """Test function for the CameraManager class."""
-    manager = CameraManager()
-    
-    # Scan for devices
-    devices = manager.scan_devices()
-    print(f"Found {len(devices)} camera devices:")
-    for device in devices:
-        print(f"  Device {device['id']}: {device['name']} - {device['width']}x{device['height']}")
-    
-    if not devices:
-        print("No camera devices found")
-        return
-    
-    # Initialize first camera
-    if manager.initialize_camera():
-        print("Camera initialized successfully")
-        print("Camera properties:", manager.get_camera_properties())
-        
-        # Test frame capture
-        ret, frame = manager.read_frame()
-        if ret:
-            print(f"Frame captured: {frame.shape}")
-        
-        # Test continuous capture
-        manager.start_capture()
-        import time
-        time.sleep(1)
-        
-        current_frame = manager.get_current_frame()
-        if current_frame is not None:
-            print(f"Continuous frame: {current_frame.shape}")
+    with CameraManager() as manager:
+        # Scan for devices
+        devices = manager.scan_devices()
+        print(f"Found {len(devices)} camera devices:")
+        for device in devices:
+            print(f"  Device {device['id']}: {device['name']} - {device['width']}x{device['height']}")
         
-        manager.stop_capture()
+        if not devices:
+            print("No camera devices found")
+            return
         
-        print("Status:", manager.get_status())
-        
-        manager.release_camera()
-    else:
-        print("Failed to initialize camera")
+        # Initialize first camera
+        if manager.initialize_camera():
+            print("Camera initialized successfully")
+            print("Camera properties:", manager.get_camera_properties())
+            
+            # Test frame capture
+            ret, frame = manager.read_frame()
+            if ret:
+                print(f"Frame captured: {frame.shape}")
+            
+            # Test continuous capture
+            manager.start_capture()
+            import time
+            time.sleep(1)
+            
+            current_frame = manager.get_current_frame()
+            if current_frame is not None:
+                print(f"Continuous frame: {current_frame.shape}")
+            
+            manager.stop_capture()
+            
+            print("Status:", manager.get_status())
+        else:
+            print("Failed to initialize camera")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_camera_manager()
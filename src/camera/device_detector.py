@@ -6,117 +6,590 @@ on the system using OpenCV.
 """
 
 import cv2
-from typing import List, Dict, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple, Union
+import contextlib
+import glob
+import json
 import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# Optional device enumeration helpers
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+try:
+    from pygrabber.dshow_graph import FilterGraph
+except ImportError:
+    FilterGraph = None
+
+try:
+    from linuxpy.video.device import Device as V4L2Device
+except ImportError:
+    V4L2Device = None
+
+# Advisory file locking for the shared device cache (POSIX / Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Native capture backend per platform; CAP_ANY would pick MSMF on Windows,
+# which can take many seconds to open each device
+if sys.platform == 'win32':
+    PREFERRED_BACKEND = cv2.CAP_DSHOW
+elif sys.platform.startswith('linux'):
+    PREFERRED_BACKEND = cv2.CAP_V4L2
+elif sys.platform == 'darwin':
+    PREFERRED_BACKEND = cv2.CAP_AVFOUNDATION
+else:
+    PREFERRED_BACKEND = cv2.CAP_ANY
+
+# Detection results shared between processes (e.g. a launcher and the server)
+DEVICE_CACHE_FILE = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'aof_vid_stream', 'devices.json'
+)
+
+# Held while DEVICE_CACHE_FILE is rewritten or removed
+DEVICE_CACHE_LOCK_FILE = DEVICE_CACHE_FILE + '.lock'
+
+# Patterns for `v4l2-ctl --list-formats-ext` output
+_V4L2_SIZE_RE = re.compile(r'Size:\s+Discrete\s+(\d+)x(\d+)')
+_V4L2_FPS_RE = re.compile(r'\(([\d.]+)\s+fps\)')
+
+
+def open_with_timeout(device_id: int, backend: int = PREFERRED_BACKEND,
+                      timeout_s: float = 2.0) -> Optional[cv2.VideoCapture]:
+    """
+    Open a camera device, giving up if the backend blocks for too long.
+    
+    Not every backend honours CAP_PROP_OPEN_TIMEOUT_MSEC, and opening a device
+    held by another process can block indefinitely, so the constructor runs in
+    a worker thread. A capture that opens after the timeout is released by
+    that thread. On macOS the constructor is called directly, since
+    AVFoundation can hang when opened off the main thread.
+    
+    Args:
+        device_id (int): Camera device ID
+        backend (int): OpenCV capture backend
+        timeout_s (float): Maximum time to wait for the device in seconds
+        
+    Returns:
+        Optional[cv2.VideoCapture]: The capture (check isOpened()), or None on timeout
+    """
+    if sys.platform == 'darwin':
+        return cv2.VideoCapture(device_id, backend)
+    
+    lock = threading.Lock()
+    state = {'cap': None, 'abandoned': False}
+    
+    def _open():
+        cap = cv2.VideoCapture(device_id, backend)
+        with lock:
+            if state['abandoned']:
+                cap.release()
+            else:
+                state['cap'] = cap
+    
+    thread = threading.Thread(target=_open, name=f"camera-open-{device_id}", daemon=True)
+    thread.start()
+    thread.join(timeout_s)
+    
+    with lock:
+        if state['cap'] is None:
+            state['abandoned'] = True
+            logger.warning("Timed out after %ss opening camera device %s", timeout_s, device_id)
+        return state['cap']
+
+# Per-thread frame buffer reused by probe reads (probes run in parallel)
+_probe_local = threading.local()
+
+
+def _probe_read(cap: cv2.VideoCapture) -> bool:
+    """
+    Check that a capture delivers a decodable frame.
+    
+    The frame is decoded into a per-thread buffer that is reused while the
+    frame size stays the same, instead of allocating a new array per probe.
+    
+    Args:
+        cap (cv2.VideoCapture): Open capture to read from
+        
+    Returns:
+        bool: True if a frame was captured and decoded
+    """
+    if not cap.grab():
+        return False
+    
+    ret, frame = cap.retrieve(getattr(_probe_local, 'frame', None))
+    if not ret or frame is None:
+        return False
+    
+    _probe_local.frame = frame
+    return True
+
+
+@contextlib.contextmanager
+def _device_cache_file_lock():
+    """
+    Hold an exclusive lock on DEVICE_CACHE_LOCK_FILE across processes.
+    
+    The lock is advisory and only taken by writers of DEVICE_CACHE_FILE;
+    readers rely on the file being replaced atomically. Without fcntl or
+    msvcrt nothing is locked.
+    """
+    with open(DEVICE_CACHE_LOCK_FILE, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@dataclass
+class DeviceInfo:
+    """Properties of a detected camera device."""
+    __slots__ = ('id', 'name', 'width', 'height', 'fps', 'available')
+    
+    id: int
+    name: str
+    width: int
+    height: int
+    fps: float
+    available: bool
+    
+    @classmethod
+    def from_dict(cls, device: Dict) -> 'DeviceInfo':
+        """Create device info from its dictionary form."""
+        return cls(
+            id=device['id'],
+            name=device.get('name', f"Camera {device['id']}"),
+            width=device.get('width', 640),
+            height=device.get('height', 480),
+            fps=device.get('fps', 30),
+            available=device.get('available', True)
+        )
+    
+    def to_dict(self) -> Dict:
+        """Convert to the dictionary form returned by the public API."""
+        return asdict(self)
+
 
 class DeviceDetector:
     """
     Handles detection and enumeration of camera devices.
     """
     
+    # Seconds a detection result is reused before the hardware is probed again
+    CACHE_TTL = 5.0
+    
     def __init__(self):
         """Initialize the device detector."""
-        self.available_devices: List[Dict] = []
+        # Detected devices keyed by id, plus detection order for iteration
+        self._by_id: Dict[int, DeviceInfo] = {}
+        self._order: List[int] = []
+        self._device_dicts: Optional[List[Dict]] = []
+        
+        # Detection cache: (max_devices, quick_scan) -> (timestamp, devices)
+        self._cache: Dict[Tuple[int, bool], Tuple[float, List[DeviceInfo]]] = {}
+        self._cache_lock = threading.Lock()
+        
+        # Supported resolutions per device; capabilities don't change while plugged in
+        self._res_cache: Dict[int, List[Dict]] = {}
+    
+    @property
+    def available_devices(self) -> List[Dict]:
+        """List of detected camera devices (dictionaries, in detection order)."""
+        if self._device_dicts is None:
+            self._device_dicts = [self._by_id[device_id].to_dict() for device_id in self._order]
+        return self._device_dicts
+    
+    @available_devices.setter
+    def available_devices(self, devices: List[Union[Dict, DeviceInfo]]):
+        """Replace the detected devices and rebuild the id index."""
+        infos = [
+            device if isinstance(device, DeviceInfo) else DeviceInfo.from_dict(device)
+            for device in devices
+        ]
+        self._by_id = {info.id: info for info in infos}
+        self._order = [info.id for info in infos]
+        
+        # Keep the caller's dictionaries when given; otherwise build them lazily
+        if all(isinstance(device, dict) for device in devices):
+            self._device_dicts = devices
+        else:
+            self._device_dicts = None
+    
+    def get_device(self, device_id: int) -> Optional[DeviceInfo]:
+        """
+        Get the typed record of a detected camera device.
+        
+        Args:
+            device_id (int): The camera device ID
+            
+        Returns:
+            Optional[DeviceInfo]: Device information or None if not found
+        """
+        return self._by_id.get(device_id)
     
-    def detect_cameras(self, max_devices: int = 4, quick_scan: bool = True) -> List[Dict]:
+    def detect_cameras(self, max_devices: int = 4, quick_scan: bool = True,
+                       force: bool = False, cache_ttl_s: Optional[float] = None,
+                       probe_resolutions: bool = False,
+                       stop_after_consecutive_failures: int = 0) -> List[Dict]:
         """
         Detect available camera devices on the system.
         
+        Results are cached in memory and in DEVICE_CACHE_FILE, so repeated
+        calls - including from other processes - skip re-enumeration while the
+        result is fresh. Concurrent callers share a single probe.
+        
         Args:
             max_devices (int): Maximum number of devices to check (default: 4 for faster scanning)
             quick_scan (bool): If True, use quick detection with minimal testing
+            force (bool): If True, bypass the cache and probe the hardware
+            cache_ttl_s (Optional[float]): Maximum age of a cached result in
+                seconds (default: CACHE_TTL)
+            probe_resolutions (bool): If True, also memoize each device's
+                supported resolutions while its probe handle is open, saving a
+                second open in get_supported_resolutions()
+            stop_after_consecutive_failures (int): Stop once this many device
+                IDs in a row have no usable camera (0 probes every candidate).
+                Only applies when device IDs can't be enumerated and every
+                index below max_devices is probed blindly
             
         Returns:
             List[Dict]: List of available camera devices with their properties
         """
-        logger.info(f"Starting {'quick' if quick_scan else 'full'} camera device detection...")
-        self.available_devices = []
+        key = (max_devices, quick_scan)
+        ttl = self.CACHE_TTL if cache_ttl_s is None else cache_ttl_s
         
-        for device_id in range(max_devices):
+        with self._cache_lock:
+            if not force:
+                cached = self._cache.get(key)
+                if cached and probe_resolutions and any(device.id not in self._res_cache for device in cached[1]):
+                    cached = None
+                if cached and time.monotonic() - cached[0] < ttl:
+                    self.available_devices = cached[1]
+                    return self.available_devices
+                
+                devices = None if probe_resolutions else self._load_persisted_devices(key, ttl)
+                if devices is not None:
+                    logger.info("Using %s camera devices from %s", len(devices), DEVICE_CACHE_FILE)
+                    self._cache[key] = (time.monotonic(), devices)
+                    self.available_devices = devices
+                    return self.available_devices
+            
+            devices = self._scan_devices(
+                max_devices, quick_scan, probe_resolutions, stop_after_consecutive_failures
+            )
+            self._cache[key] = (time.monotonic(), devices)
+            self._persist_devices(key, devices)
+            self.available_devices = devices
+            return self.available_devices
+    
+    def invalidate_cache(self):
+        """Drop cached detection results so the next scan probes the hardware."""
+        with self._cache_lock:
+            self._cache.clear()
             try:
-                # Try to open the camera device with minimal timeout
-                cap = cv2.VideoCapture(device_id)
+                with _device_cache_file_lock():
+                    os.remove(DEVICE_CACHE_FILE)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _cache_file_key(key: Tuple[int, bool]) -> str:
+        """Get the JSON object key for a (max_devices, quick_scan) cache key."""
+        return f"{key[0]}:{'quick' if key[1] else 'full'}"
+    
+    def _load_persisted_devices(self, key: Tuple[int, bool], ttl: float) -> Optional[List[DeviceInfo]]:
+        """
+        Load a detection result persisted by this or another process.
+        
+        Args:
+            key: (max_devices, quick_scan) cache key
+            ttl (float): Maximum age of the result in seconds
+            
+        Returns:
+            Optional[List[DeviceInfo]]: Devices, or None if missing or expired
+        """
+        try:
+            with open(DEVICE_CACHE_FILE, 'r') as f:
+                entry = json.load(f).get(self._cache_file_key(key))
+            
+            if not entry or time.time() - entry.get('timestamp', 0) >= ttl:
+                return None
+            return [DeviceInfo.from_dict(device) for device in entry.get('devices', [])]
+            
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _persist_devices(self, key: Tuple[int, bool], devices: List[DeviceInfo]):
+        """
+        Persist a detection result for other processes (best effort).
+        
+        Args:
+            key: (max_devices, quick_scan) cache key
+            devices (List[DeviceInfo]): Detected devices
+        """
+        try:
+            os.makedirs(os.path.dirname(DEVICE_CACHE_FILE), exist_ok=True)
+            
+            # Other processes may be updating other keys, so the read, update
+            # and write happen under the file lock
+            with _device_cache_file_lock():
+                try:
+                    with open(DEVICE_CACHE_FILE, 'r') as f:
+                        entries = json.load(f)
+                except (OSError, ValueError):
+                    entries = {}
                 
-                # Set shorter timeout for faster detection
-                cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 1000)  # 1 second timeout
+                entries[self._cache_file_key(key)] = {
+                    'timestamp': time.time(),
+                    'devices': [device.to_dict() for device in devices]
+                }
                 
-                if cap.isOpened():
-                    if quick_scan:
-                        # Quick scan: use default resolution and test basic functionality
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        fps = cap.get(cv2.CAP_PROP_FPS)
-                        
-                        # Quick frame test - just try to read one frame
-                        ret, _ = cap.read()
-                        
-                        if ret:
-                            device_info = {
-                                'id': device_id,
-                                'name': f'Camera {device_id}',
-                                'width': width if width > 0 else 640,
-                                'height': height if height > 0 else 480,
-                                'fps': fps if fps > 0 else 30,
-                                'available': True
-                            }
-                            self.available_devices.append(device_info)
-                            logger.info(f"Quick detected camera device {device_id}: {width}x{height} @ {fps}fps")
-                    else:
-                        # Full scan with resolution testing (original behavior)
-                        test_resolutions = [
-                            (1920, 1080),  # 1080p
-                            (1280, 720),   # 720p
-                            (640, 480),    # VGA (reduced list for speed)
-                        ]
-                        
-                        best_width, best_height = 640, 480  # Default fallback
-                        
-                        # Test each resolution to find the highest supported one
-                        for test_width, test_height in test_resolutions:
-                            cap.set(cv2.CAP_PROP_FRAME_WIDTH, test_width)
-                            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, test_height)
-                            
-                            # Verify what was actually set
-                            actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                            actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                            
-                            # If we got close to what we requested, use it
-                            if actual_width >= test_width * 0.9 and actual_height >= test_height * 0.9:
-                                best_width, best_height = actual_width, actual_height
-                                break
-                        
-                        # Set FPS to 30 (skip multiple FPS testing for speed)
-                        cap.set(cv2.CAP_PROP_FPS, 30)
-                        fps = cap.get(cv2.CAP_PROP_FPS)
-                        
-                        # Test if we can actually read from the camera
-                        ret, frame = cap.read()
-                        
-                        if ret and frame is not None:
-                            device_info = {
-                                'id': device_id,
-                                'name': f'Camera {device_id}',
-                                'width': best_width,
-                                'height': best_height,
-                                'fps': fps if fps > 0 else 30,
-                                'available': True
-                            }
-                            self.available_devices.append(device_info)
-                            logger.info(f"Full detected camera device {device_id}: {best_width}x{best_height} @ {fps}fps")
-                    
-                    cap.release()
-                    
+                # Write to a temp file and rename so readers never see a partial file
+                temp_file = f"{DEVICE_CACHE_FILE}.{os.getpid()}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(temp_file, DEVICE_CACHE_FILE)
+            
+        except Exception as e:
+            logger.debug("Could not persist camera device cache: %s", e)
+    
+    def _scan_devices(self, max_devices: int, quick_scan: bool,
+                      probe_resolutions: bool = False,
+                      stop_after_consecutive_failures: int = 0) -> List[DeviceInfo]:
+        """
+        Probe camera devices on the system (uncached).
+        
+        Args:
+            max_devices (int): Maximum number of devices to check
+            quick_scan (bool): If True, use quick detection with minimal testing
+            probe_resolutions (bool): If True, memoize supported resolutions too
+            stop_after_consecutive_failures (int): Stop after this many misses
+                in a row (0 disables)
+            
+        Returns:
+            List[DeviceInfo]: Available camera devices sorted by id
+        """
+        logger.info("Starting %s camera device detection...", 'quick' if quick_scan else 'full')
+        
+        candidate_ids, enumerated = self._candidate_device_ids(max_devices)
+        if not candidate_ids:
+            logger.info("Detection complete. No camera device nodes found.")
+            return []
+        
+        # Enumerated IDs can have gaps (e.g. metadata nodes filtered out), so
+        # misses there say nothing about the IDs that follow
+        stop_after = 0 if enumerated else stop_after_consecutive_failures
+        
+        # Probes are independent blocking I/O, so overlap them. Results are
+        # consumed in id order, which keeps get_default_device() deterministic.
+        # When the scan can stop early only a few probes are kept in flight,
+        # so the stop actually saves the remaining opens.
+        devices = []
+        workers = min(stop_after, len(candidate_ids)) if stop_after else len(candidate_ids)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = deque()
+        submitted = 0
+        try:
+            misses = 0
+            for device_id in candidate_ids:
+                while submitted < len(candidate_ids) and len(futures) < workers:
+                    futures.append(executor.submit(
+                        self._probe_device, candidate_ids[submitted], quick_scan, probe_resolutions
+                    ))
+                    submitted += 1
+                
+                device_info = futures.popleft().result()
+                if device_info:
+                    devices.append(device_info)
+                    misses = 0
+                    continue
+                
+                misses += 1
+                if stop_after and misses >= stop_after:
+                    logger.debug("Stopping detection after %s consecutive misses (last id %s)", misses, device_id)
+                    break
+        finally:
+            # Don't wait for probes that are no longer needed; they release
+            # their capture handles when they finish
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        logger.info("Detection complete. Found %s camera devices.", len(devices))
+        return devices
+    
+    def _candidate_device_ids(self, max_devices: int) -> Tuple[List[int], bool]:
+        """
+        Get device IDs worth probing, skipping indices with no backing device.
+        
+        On Linux only existing /dev/videoN capture nodes are returned; on Windows
+        the DirectShow device list is used when pygrabber is installed. Elsewhere
+        every index below max_devices is a candidate.
+        
+        Args:
+            max_devices (int): Maximum number of devices to check
+            
+        Returns:
+            Tuple[List[int], bool]: Sorted candidate device IDs (at most
+                max_devices), and whether they were enumerated rather than
+                every index below max_devices
+        """
+        if max_devices <= 0:
+            return [], True
+        
+        if sys.platform.startswith('linux'):
+            if pyudev is not None:
+                try:
+                    context = pyudev.Context()
+                    device_ids = []
+                    for device in context.list_devices(subsystem='video4linux'):
+                        # Skip metadata-only nodes that can't capture frames
+                        capabilities = device.properties.get('ID_V4L_CAPABILITIES', ':capture:')
+                        suffix = (device.device_node or '').rsplit('video', 1)[-1]
+                        if ':capture:' in capabilities and suffix.isdigit():
+                            device_ids.append(int(suffix))
+                    return sorted(device_ids)[:max_devices], True
+                except Exception as e:
+                    logger.debug("udev enumeration failed, falling back to /dev scan: %s", e)
+            
+            device_ids = []
+            for path in glob.glob('/dev/video*'):
+                suffix = path.rsplit('video', 1)[1]
+                if suffix.isdigit():
+                    device_ids.append(int(suffix))
+            return sorted(device_ids)[:max_devices], True
+        
+        if sys.platform == 'win32' and FilterGraph is not None:
+            try:
+                device_count = len(FilterGraph().get_input_devices())
+                return list(range(min(device_count, max_devices))), True
             except Exception as e:
-                logger.debug(f"Device {device_id} not available: {e}")
-                continue
+                logger.debug("DirectShow enumeration failed, probing all indices: %s", e)
         
-        logger.info(f"Detection complete. Found {len(self.available_devices)} camera devices.")
-        return self.available_devices
+        return list(range(max_devices)), False
+    
+    def _probe_device(self, device_id: int, quick_scan: bool,
+                      probe_resolutions: bool = False) -> Optional[DeviceInfo]:
+        """
+        Open a single camera device and collect its properties.
+        
+        Args:
+            device_id (int): The camera device ID
+            quick_scan (bool): If True, use quick detection with minimal testing
+            probe_resolutions (bool): If True, memoize the device's supported
+                resolutions using the same open handle
+            
+        Returns:
+            Optional[DeviceInfo]: Device information or None if the device is not usable
+        """
+        cap = None
+        device_info = None
+        try:
+            # Try to open the camera device with a short timeout
+            cap = open_with_timeout(device_id, timeout_s=1.0)
+            
+            if cap is None or not cap.isOpened():
+                return None
+            
+            # Keep a single driver buffer so the probe read returns promptly
+            # (a no-op returning False on backends that don't support it)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
+            if quick_scan:
+                # Quick scan: use default resolution and test basic functionality
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                
+                # Quick frame test - grab one frame without decoding it
+                ret = cap.grab()
+                
+                if ret:
+                    logger.debug("Quick detected camera device %d: %dx%d @ %sfps", device_id, width, height, fps)
+                    device_info = DeviceInfo(
+                        id=device_id,
+                        name=f'Camera {device_id}',
+                        width=width if width > 0 else 640,
+                        height=height if height > 0 else 480,
+                        fps=fps if fps > 0 else 30,
+                        available=True
+                    )
+            else:
+                # Full scan: one resolution negotiation instead of trying each mode
+                target_width, target_height = 1920, 1080  # 1080p
+                
+                best_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                best_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                
+                # Only ask for more when the driver's native mode is smaller;
+                # the driver snaps the request to its nearest supported size
+                if best_width < target_width or best_height < target_height:
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, target_width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target_height)
+                    best_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                    best_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                
+                if best_width <= 0 or best_height <= 0:
+                    best_width, best_height = 640, 480  # Default fallback
+                
+                # Report the driver's FPS without reconfiguring it; drivers that
+                # report 0 are recorded as 30 fps below
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                
+                # Test if we can actually read from the camera
+                if _probe_read(cap):
+                    logger.debug("Full detected camera device %d: %dx%d @ %sfps", device_id, best_width, best_height, fps)
+                    device_info = DeviceInfo(
+                        id=device_id,
+                        name=f'Camera {device_id}',
+                        width=best_width,
+                        height=best_height,
+                        fps=fps if fps > 0 else 30,
+                        available=True
+                    )
+            
+            # Reuse the open handle rather than reopening the device later
+            if device_info is not None and probe_resolutions:
+                self.get_supported_resolutions(device_id, cap=cap)
+            
+        except Exception as e:
+            logger.debug("Device %s not available: %s", device_id, e)
+        finally:
+            if cap is not None:
+                cap.release()
+        
+        return device_info
     
     def get_device_info(self, device_id: int) -> Optional[Dict]:
         """
@@ -128,10 +601,8 @@ class DeviceDetector:
         Returns:
             Optional[Dict]: Device information or None if not found
         """
-        for device in self.available_devices:
-            if device['id'] == device_id:
-                return device
-        return None
+        info = self._by_id.get(device_id)
+        return info.to_dict() if info is not None else None
     
     def get_available_devices(self) -> List[Dict]:
         """
@@ -152,7 +623,7 @@ class DeviceDetector:
         Returns:
             bool: True if device is available, False otherwise
         """
-        return any(device['id'] == device_id for device in self.available_devices)
+        return device_id in self._by_id
     
     def get_default_device(self) -> Optional[Dict]:
         """
@@ -161,24 +632,168 @@ class DeviceDetector:
         Returns:
             Optional[Dict]: Default device information or None if no devices available
         """
-        if self.available_devices:
-            return self.available_devices[0]
+        if self._order:
+            return self._by_id[self._order[0]].to_dict()
         return None
     
-    def get_supported_resolutions(self, device_id: int) -> List[Dict]:
+    def invalidate_resolutions(self, device_id: Optional[int] = None):
+        """
+        Forget memoized resolutions, e.g. after a camera was hot-plugged.
+        
+        Args:
+            device_id (Optional[int]): Device to forget, or None for all devices
+        """
+        if device_id is None:
+            self._res_cache.clear()
+        else:
+            self._res_cache.pop(device_id, None)
+    
+    def get_supported_resolutions(self, device_id: int,
+                                  cap: Optional[cv2.VideoCapture] = None) -> List[Dict]:
         """
         Get all supported resolutions for a specific camera device.
         
+        The probe result is memoized per device; use invalidate_resolutions()
+        to force a new probe.
+        
         Args:
             device_id (int): The camera device ID
+            cap (Optional[cv2.VideoCapture]): Already open capture for the
+                device to probe with; it is left open (default: open one)
             
         Returns:
             List[Dict]: List of supported resolutions with format {'width': int, 'height': int, 'fps': float}
         """
+        cached = self._res_cache.get(device_id)
+        if cached is not None:
+            return list(cached)
+        
+        # Ask the driver for its capability list first; probing is the fallback
+        supported_resolutions = (
+            self._query_linuxpy_resolutions(device_id)
+            or self._query_v4l2_resolutions(device_id)
+        )
+        if supported_resolutions:
+            self._res_cache[device_id] = list(supported_resolutions)
+            return supported_resolutions
+        
+        supported_resolutions = self._probe_resolutions(device_id, cap)
+        
+        # Don't memoize failures - the device may just be busy
+        if supported_resolutions:
+            self._res_cache[device_id] = list(supported_resolutions)
+        
+        return supported_resolutions
+    
+    @staticmethod
+    def _modes_to_resolutions(modes) -> List[Dict]:
+        """
+        Convert (width, height, fps) modes to resolution dicts.
+        
+        Args:
+            modes: Iterable of unique (width, height, fps) tuples
+            
+        Returns:
+            List[Dict]: Resolutions sorted by area then FPS (highest first)
+        """
+        return [
+            {'width': width, 'height': height, 'fps': fps}
+            for width, height, fps in sorted(modes, key=lambda m: (m[0] * m[1], m[2]), reverse=True)
+        ]
+    
+    def _query_linuxpy_resolutions(self, device_id: int) -> List[Dict]:
+        """
+        Enumerate frame sizes and rates through V4L2 ioctls using linuxpy.
+        
+        Args:
+            device_id (int): The camera device ID
+            
+        Returns:
+            List[Dict]: Supported resolutions, or an empty list if linuxpy is
+            unavailable or the query failed
+        """
+        if V4L2Device is None or not sys.platform.startswith('linux'):
+            return []
+        
+        try:
+            modes = set()
+            with V4L2Device.from_id(device_id) as device:
+                for frame_size in device.info.frame_sizes:
+                    fps = frame_size.max_fps
+                    if fps:
+                        modes.add((int(frame_size.width), int(frame_size.height), float(fps)))
+            return self._modes_to_resolutions(modes)
+            
+        except Exception as e:
+            logger.debug("linuxpy query failed for device %s: %s", device_id, e)
+            return []
+    
+    def _query_v4l2_resolutions(self, device_id: int) -> List[Dict]:
+        """
+        Read the frame sizes and intervals a V4L2 device advertises.
+        
+        Args:
+            device_id (int): The camera device ID
+            
+        Returns:
+            List[Dict]: Supported resolutions sorted by area then FPS (highest
+            first), or an empty list if v4l2-ctl is unavailable
+        """
+        if not sys.platform.startswith('linux') or shutil.which('v4l2-ctl') is None:
+            return []
+        
+        try:
+            result = subprocess.run(
+                ['v4l2-ctl', '-d', f'/dev/video{device_id}', '--list-formats-ext'],
+                capture_output=True, text=True, timeout=2
+            )
+        except Exception as e:
+            logger.debug("v4l2-ctl query failed for device %s: %s", device_id, e)
+            return []
+        
+        if result.returncode != 0:
+            return []
+        
+        # The same size/interval can be listed once per pixel format (MJPG, YUYV, ...)
+        modes = set()
+        size = None
+        for line in result.stdout.splitlines():
+            size_match = _V4L2_SIZE_RE.search(line)
+            if size_match:
+                size = (int(size_match.group(1)), int(size_match.group(2)))
+                continue
+            
+            fps_match = _V4L2_FPS_RE.search(line)
+            if fps_match and size is not None:
+                modes.add((size[0], size[1], float(fps_match.group(1))))
+        
+        return self._modes_to_resolutions(modes)
+    
+    def _probe_resolutions(self, device_id: int,
+                           cap: Optional[cv2.VideoCapture] = None) -> List[Dict]:
+        """
+        Find supported resolutions by setting and reading back common modes.
+        
+        Args:
+            device_id (int): The camera device ID
+            cap (Optional[cv2.VideoCapture]): Already open capture to reuse
+                (not released); if None a capture is opened and released
+            
+        Returns:
+            List[Dict]: Supported resolutions sorted by area then FPS (highest first)
+        """
         supported_resolutions = []
+        owns_cap = cap is None
         
         try:
-            cap = cv2.VideoCapture(device_id)
+            if owns_cap:
+                cap = open_with_timeout(device_id)
+                if cap is None:
+                    return supported_resolutions
+                
+                # Keep a single driver buffer so each probe read returns a fresh frame
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
             if not cap.isOpened():
                 return supported_resolutions
             
@@ -194,45 +809,65 @@ class DeviceDetector:
                 (320, 240),    # QVGA
             ]
             
+            # Reconfiguring the driver is expensive: only set values that change
+            current_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            current_fps = cap.get(cv2.CAP_PROP_FPS)
+            probed_sizes = set()
+            seen_modes = set()
+            
             for width, height in test_resolutions:
                 # Try to set the resolution
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                if (width, height) != current_size:
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                    
+                    # Check what was actually set
+                    current_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
                 
-                # Check what was actually set
-                actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                # The driver snapped to a size that was already probed
+                if current_size in probed_sizes:
+                    continue
+                probed_sizes.add(current_size)
+                actual_width, actual_height = current_size
                 
                 # Test if we can capture a frame at this resolution
-                ret, frame = cap.read()
-                if ret and frame is not None:
+                if _probe_read(cap):
                     # Test different FPS values
+                    previous_fps = None
                     for test_fps in [60, 30, 15]:
-                        cap.set(cv2.CAP_PROP_FPS, test_fps)
-                        actual_fps = cap.get(cv2.CAP_PROP_FPS)
-                        
-                        resolution_info = {
-                            'width': actual_width,
-                            'height': actual_height,
-                            'fps': actual_fps
-                        }
+                        if current_fps != test_fps:
+                            cap.set(cv2.CAP_PROP_FPS, test_fps)
+                            current_fps = cap.get(cv2.CAP_PROP_FPS)
                         
                         # Avoid duplicates
-                        if resolution_info not in supported_resolutions:
-                            supported_resolutions.append(resolution_info)
-            
-            cap.release()
+                        mode = (actual_width, actual_height, current_fps)
+                        if mode not in seen_modes:
+                            seen_modes.add(mode)
+                            supported_resolutions.append({
+                                'width': actual_width,
+                                'height': actual_height,
+                                'fps': current_fps
+                            })
+                        
+                        # The driver stopped honouring FPS requests at this size
+                        if current_fps == previous_fps:
+                            break
+                        previous_fps = current_fps
             
         except Exception as e:
-            logger.error(f"Error getting supported resolutions for device {device_id}: {e}")
+            logger.error("Error getting supported resolutions for device %s: %s", device_id, e)
+        finally:
+            if owns_cap and cap is not None:
+                cap.release()
         
+        supported_resolutions.sort(key=lambda r: (r['width'] * r['height'], r['fps']), reverse=True)
         return supported_resolutions
 
 
 def test_device_detector():
     """Test function for the DeviceDetector class."""
     detector = DeviceDetector()
-    devices = detector.detect_cameras()
+    devices = detector.detect_cameras(probe_resolutions=True)
     
     print(f"Found {len(devices)} camera devices:")
     for device in devices:
@@ -252,4 +887,5 @@ def test_device_detector():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_device_detector()
@@ -0,0 +1,115 @@
+"""
+Frame Ring Buffer Module
+
+This module provides a single-producer ring buffer of pre-allocated frame
+slots. The capture thread copies each new frame into the next slot and then
+publishes its sequence number; readers look up the latest slot without
+taking a lock or copying the frame.
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+class FrameRingBuffer:
+    """
+    Lock-free single-producer ring buffer for video frames.
+
+    Publishing the sequence number is a single attribute store, which is
+    atomic under the GIL, so readers always see a fully written slot. A slot
+    is only overwritten after ``slots - 1`` newer frames have been published,
+    so readers must finish with a frame within that window (8 slots is about
+    a quarter of a second at 30 fps).
+    """
+
+    def __init__(self, slots: int = 8):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            slots (int): Number of frame slots, must be a power of two
+        """
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError(f"slots must be a power of two >= 2, got {slots}")
+
+        self._slots: List[Optional[np.ndarray]] = [None] * slots
+        self._mask = slots - 1
+        self._published = -1
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the latest published frame (-1 if none)."""
+        return self._published
+
+    def publish(self, frame: np.ndarray) -> int:
+        """
+        Copy a frame into the next slot and publish it (producer only).
+
+        Args:
+            frame (np.ndarray): Frame to publish
+
+        Returns:
+            int: Sequence number of the published frame
+        """
+        seq = self._published + 1
+        index = seq & self._mask
+        slot = self._slots[index]
+
+        # Slots are allocated lazily and reused while the frame format is unchanged
+        if slot is None or slot.shape != frame.shape or slot.dtype != frame.dtype:
+            slot = np.empty_like(frame)
+            self._slots[index] = slot
+
+        np.copyto(slot, frame)
+        self._published = seq
+        return seq
+
+    def next_slot(self) -> Optional[np.ndarray]:
+        """
+        Get the buffer the next frame will occupy (producer only).
+
+        Capture code can decode straight into this buffer and then pass the
+        result to commit(), avoiding the copy made by publish().
+
+        Returns:
+            Optional[np.ndarray]: Slot buffer, or None if not allocated yet
+        """
+        return self._slots[(self._published + 1) & self._mask]
+
+    def commit(self, frame: np.ndarray) -> int:
+        """
+        Publish a frame without copying it (producer only).
+
+        The frame becomes the next slot's buffer, so it must either be the
+        array returned by next_slot() or a new array nothing else will modify.
+
+        Args:
+            frame (np.ndarray): Frame to publish
+
+        Returns:
+            int: Sequence number of the published frame
+        """
+        seq = self._published + 1
+        self._slots[seq & self._mask] = frame
+        self._published = seq
+        return seq
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Get the latest published frame without copying it.
+
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: (sequence, read-only frame view or None)
+        """
+        seq = self._published
+        if seq < 0:
+            return seq, None
+
+        view = self._slots[seq & self._mask].view()
+        view.flags.writeable = False
+        return seq, view
+
+    def clear(self):
+        """Drop all published frames."""
+        self._published = -1
+        self._slots = [None] * len(self._slots)
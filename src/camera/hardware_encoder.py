@@ -7,28 +7,458 @@ Intel Quick Sync, and other hardware encoders for maximum performance.
 
 import cv2
 import numpy as np
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, List, Set, Union
+from dataclasses import asdict, dataclass
+import contextlib
+import functools
+import json
 import logging
+import os
+import platform
+import shutil
+import tempfile
 import threading
 import time
 import subprocess
 import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Optional libjpeg-turbo bindings (SIMD DCT/Huffman) for faster JPEG encoding
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420, TJFLAG_PROGRESSIVE
+except ImportError:
+    TurboJPEG = None
+    TJPF_BGR = None
+    TJSAMP_420 = None
+    TJFLAG_PROGRESSIVE = None
+
+# Optional nvJPEG bindings for GPU JPEG encoding (pynvjpeg)
+try:
+    from nvjpeg import NvJpeg
+except ImportError:
+    NvJpeg = None
 
 logger = logging.getLogger(__name__)
 
+# Registry class key holding one subkey per installed display adapter (Windows)
+DISPLAY_ADAPTER_CLASS_KEY = r'SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}'
+
+# Codec probes are dominated by FFmpeg open latency, so they overlap well in threads
+CODEC_PROBE_WORKERS = 8
+
+# Number of recent encode durations kept for statistics (power of two)
+ENCODE_TIME_WINDOW = 256
+
+# FFmpeg options forcing low-latency NVENC, passed to OpenCV's VideoWriter through
+# OPENCV_FFMPEG_WRITER_OPTIONS ("key;value" pairs separated by "|")
+NVENC_ENCODERS = {'H264': 'h264_nvenc', 'H265': 'hevc_nvenc'}
+NVENC_WRITER_OPTIONS = 'preset;p4|tune;ll|rc;vbr|cq;23|bf;0'
+
+# OPENCV_FFMPEG_WRITER_OPTIONS is process-wide and read when a writer opens
+_writer_env_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _ffmpeg_writer_options(options: Optional[str]):
+    """
+    Temporarily set OPENCV_FFMPEG_WRITER_OPTIONS while opening a VideoWriter.
+    
+    Args:
+        options (Optional[str]): Writer options, or None to leave the environment alone
+    """
+    if not options:
+        yield
+        return
+    
+    with _writer_env_lock:
+        previous = os.environ.get('OPENCV_FFMPEG_WRITER_OPTIONS')
+        os.environ['OPENCV_FFMPEG_WRITER_OPTIONS'] = options
+        try:
+            yield
+        finally:
+            if previous is None:
+                os.environ.pop('OPENCV_FFMPEG_WRITER_OPTIONS', None)
+            else:
+                os.environ['OPENCV_FFMPEG_WRITER_OPTIONS'] = previous
+
+
+# Detected capabilities are persisted here so later runs skip the codec probes
+CAPABILITIES_CACHE_FILE = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'aof_vid_stream', 'hw_caps.json'
+)
+
+# Seconds a persisted detection result is trusted, which also catches driver
+# and library changes the cache key can't see
+CAPABILITIES_CACHE_TTL = 7 * 24 * 3600
+
+# Kernel driver version file of the NVIDIA driver (Linux)
+NVIDIA_DRIVER_VERSION_FILE = '/proc/driver/nvidia/version'
+
+# Lazily created TurboJPEG instance (False once loading the library failed)
+_turbojpeg = None
+
+# imencode parameter lists for encode_jpeg, keyed by (quality, progressive)
+_imencode_param_cache: Dict[Tuple[int, bool], List[int]] = {}
+
+# Lazily created nvJPEG encoder (False once creation has failed)
+_nvjpeg = None
+_nvjpeg_lock = threading.Lock()
+
+
+def _get_turbojpeg():
+    """Get the shared TurboJPEG instance, or None if it is unavailable."""
+    global _turbojpeg
+    
+    if _turbojpeg is None:
+        if TurboJPEG is None:
+            _turbojpeg = False
+        else:
+            try:
+                _turbojpeg = TurboJPEG()
+            except Exception as e:
+                logger.warning(f"libturbojpeg could not be loaded, using OpenCV JPEG encoder: {e}")
+                _turbojpeg = False
+    
+    return _turbojpeg or None
+
+
+def _get_nvjpeg():
+    """Get the shared nvJPEG encoder, or None if it is unavailable."""
+    global _nvjpeg
+    
+    if _nvjpeg is None:
+        if NvJpeg is None:
+            _nvjpeg = False
+        else:
+            try:
+                _nvjpeg = NvJpeg()
+            except Exception as e:
+                logger.warning(f"nvJPEG could not be initialized, using CPU JPEG encoder: {e}")
+                _nvjpeg = False
+    
+    return _nvjpeg or None
+
+
+def _imencode_params(quality: int, progressive: bool) -> List[int]:
+    """Get the cached cv2.imencode parameter list for a quality and mode."""
+    key = (quality, progressive)
+    params = _imencode_param_cache.get(key)
+    if params is None:
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        if progressive:
+            params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+        _imencode_param_cache[key] = params
+    return params
+
+
+def _jpeg_output(encoded_frame: np.ndarray, zero_copy: bool) -> Union[bytes, memoryview]:
+    """Return cv2.imencode output as bytes, or as a view of its buffer when zero_copy is set."""
+    return encoded_frame.reshape(-1).data if zero_copy else encoded_frame.tobytes()
+
+
+def set_opencv_threads(high_parallel: bool = False):
+    """
+    Set how many threads OpenCV may use inside a single call.
+    
+    Called by the application factory; importing this module leaves
+    OpenCV's process-wide setting alone.
+    
+    OpenCV parallelizes imencode/cvtColor across every core by default. With
+    several cameras each encoding on its own thread that oversubscribes the
+    CPU (cameras x cores threads), so by default each call is kept to one
+    thread and parallelism comes from the cameras instead. A single camera
+    at high resolution can encode faster with all cores.
+    
+    Args:
+        high_parallel (bool): Let each OpenCV call use all CPU cores
+    """
+    try:
+        cv2.setNumThreads((os.cpu_count() or 1) if high_parallel else 1)
+    except Exception as e:
+        logger.warning(f"Could not set OpenCV thread count: {e}")
+
+
+@functools.lru_cache(maxsize=1)
+def check_jpeg_simd() -> Optional[bool]:
+    """
+    Check whether OpenCV's JPEG codec was built with libjpeg-turbo SIMD.
+    
+    Logs a warning (once) when SIMD is disabled, since cv2.imencode is then
+    several times slower than necessary.
+    
+    Returns:
+        Optional[bool]: True/False from the build information, or None if it is not reported
+    """
+    try:
+        build_info = cv2.getBuildInformation()
+    except Exception:
+        return None
+    
+    in_jpeg_section = False
+    for line in build_info.splitlines():
+        key, _, value = line.strip().partition(':')
+        if key == 'JPEG':
+            in_jpeg_section = True
+        elif in_jpeg_section and key == 'SIMD Support':
+            simd_enabled = value.strip().upper().startswith('YES')
+            if not simd_enabled:
+                logger.warning("OpenCV's libjpeg-turbo was built without SIMD; JPEG encoding will be slow. "
+                               "Install PyTurboJPEG or rebuild OpenCV with ENABLE_LIBJPEG_TURBO_SIMD=ON")
+            return simd_enabled
+        elif in_jpeg_section and not line.startswith('      '):
+            # Left the JPEG block without a SIMD line
+            break
+    
+    return None
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = 85, progressive: bool = False,
+                zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
+    """
+    Encode a BGR frame as JPEG.
+    
+    Uses libjpeg-turbo through PyTurboJPEG when it is installed and falls back
+    to cv2.imencode otherwise.
+    
+    Args:
+        frame (np.ndarray): Input BGR frame
+        quality (int): JPEG quality (1-100)
+        progressive (bool): Produce progressive instead of baseline JPEG
+        zero_copy (bool): Allow returning a memoryview over the encoder's output
+            buffer instead of copying it into bytes
+        
+    Returns:
+        Optional[Union[bytes, memoryview]]: Encoded JPEG data or None on failure
+    """
+    if frame is None or frame.size == 0:
+        return None
+    
+    turbojpeg = _get_turbojpeg()
+    if turbojpeg is not None and frame.ndim == 3 and frame.shape[2] == 3:
+        try:
+            flags = TJFLAG_PROGRESSIVE if progressive else 0
+            # BGR input goes straight into libjpeg-turbo's SIMD color conversion;
+            # 4:2:0 matches OpenCV's default and PyTurboJPEG would use 4:2:2
+            return turbojpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR,
+                                    jpeg_subsample=TJSAMP_420, flags=flags)
+        except Exception as e:
+            logger.debug(f"TurboJPEG encoding failed, falling back to OpenCV: {e}")
+    
+    try:
+        success, encoded_frame = cv2.imencode('.jpg', frame, _imencode_params(quality, progressive))
+        if success:
+            return _jpeg_output(encoded_frame, zero_copy)
+        return None
+        
+    except Exception as e:
+        logger.error(f"JPEG encoding failed: {e}")
+        return None
+
+
+# Packed fourcc codes for every codec this module probes or opens
+FOURCC = {code: cv2.VideoWriter_fourcc(*code) for code in (
+    'H264', 'HEVC', 'VP8 ', 'VP80', 'VP9 ', 'VP90', 'MJPG', 'XVID', 'DIVX',
+    'MP4V', 'FMP4', 'AV01', 'AVC1', 'X264', 'JPEG'
+)}
+
+
+def _fourcc(code: str) -> int:
+    """Get the packed fourcc for a four character code."""
+    fourcc = FOURCC.get(code)
+    return fourcc if fourcc is not None else cv2.VideoWriter_fourcc(*code)
+
+
+class _ProbeWriter:
+    """VideoWriter wrapper that remembers the path of its probe file."""
+    
+    __slots__ = ('writer', 'path')
+    
+    def __init__(self, writer, path: str):
+        self.writer = writer
+        self.path = path
+    
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+@contextlib.contextmanager
+def _probe_writer(fourcc_str: str, fmt: str, api_preference: Optional[int] = None,
+                  frame_size: Tuple[int, int] = (640, 480)):
+    """
+    Open a VideoWriter on a unique temporary file for codec probing.
+    
+    The file is created in tempfile.gettempdir() (honours TMPDIR, e.g.
+    /dev/shm) rather than the working directory, and the writer is released
+    and the file removed on exit even if the probe fails.
+    
+    Args:
+        fourcc_str (str): Four character codec code
+        fmt (str): Container file extension
+        api_preference (Optional[int]): VideoWriter backend, or None for automatic selection
+        frame_size (Tuple[int, int]): Frame size as (width, height)
+        
+    Yields:
+        _ProbeWriter: The opened writer (check isOpened()) and its file path
+    """
+    fd, path = tempfile.mkstemp(prefix='aof_codec_probe_', suffix=f'.{fmt}')
+    os.close(fd)
+    writer = None
+    
+    try:
+        fourcc = _fourcc(fourcc_str)
+        if api_preference is None:
+            writer = cv2.VideoWriter(path, fourcc, 30.0, frame_size, True)
+        else:
+            writer = cv2.VideoWriter(path, api_preference, fourcc, 30.0, frame_size, True)
+        yield _ProbeWriter(writer, path)
+    finally:
+        if writer is not None:
+            writer.release()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+@dataclass(frozen=True)
+class CodecInfo:
+    """A working fourcc/container combination for a codec."""
+    __slots__ = ('fourcc', 'format', 'hardware_support')
+    
+    fourcc: str
+    format: str
+    hardware_support: bool
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary form stored in available_codecs."""
+        return asdict(self)
+
 
 class HardwareCapabilities:
     """Detect and manage hardware encoding capabilities."""
     
-    def __init__(self):
+    __slots__ = ('nvenc_available', 'quicksync_available', 'vaapi_available', 'cuda_available',
+                 'available_codecs', 'supported_formats', '_best_codecs')
+    
+    # Attributes persisted in CAPABILITIES_CACHE_FILE
+    _CACHED_FIELDS = ('nvenc_available', 'quicksync_available', 'vaapi_available',
+                      'cuda_available', 'available_codecs', 'supported_formats')
+    
+    def __init__(self, use_cache: bool = True, codecs: Optional[List[str]] = None):
+        """
+        Detect hardware capabilities, reusing a persisted result when valid.
+        
+        Args:
+            use_cache (bool): Load/store results in CAPABILITIES_CACHE_FILE
+            codecs (Optional[List[str]]): Only probe these codecs (plus the JPEG
+                fallback) when nothing is cached; partial results are not persisted
+        """
         self.nvenc_available = False
         self.quicksync_available = False
         self.vaapi_available = False
         self.cuda_available = False
         self.available_codecs = {}
         self.supported_formats = []
-        self._detect_capabilities()
-        self._detect_codecs()
+        
+        if not (use_cache and self._load_cache()):
+            self._detect_capabilities()
+            self._detect_codecs(codecs)
+            
+            if use_cache and codecs is None:
+                self._save_cache()
+        
+        # available_codecs does not change after detection, so select once
+        self._best_codecs = {
+            prefer_hardware: self._select_best_codec(prefer_hardware)
+            for prefer_hardware in (True, False)
+        }
+    
+    @staticmethod
+    def _cache_key() -> Dict[str, Any]:
+        """
+        Identify the environment a cached detection result is valid for.
+        
+        Upgrading or rebuilding OpenCV or ffmpeg changes its version or file
+        mtime, and updating the NVIDIA driver changes its reported version,
+        so each invalidates the cache. Only cheap stats and reads are used
+        since the key is built on every startup.
+        """
+        try:
+            cuda_devices = cv2.cuda.getCudaEnabledDeviceCount()
+        except Exception:
+            cuda_devices = 0
+        
+        ffmpeg = shutil.which('ffmpeg')
+        try:
+            ffmpeg_mtime = os.path.getmtime(ffmpeg) if ffmpeg else None
+        except OSError:
+            ffmpeg_mtime = None
+        
+        try:
+            with open(NVIDIA_DRIVER_VERSION_FILE, 'r') as f:
+                nvidia_driver = f.readline().strip()
+        except OSError:
+            nvidia_driver = None
+        
+        return {
+            'platform': sys.platform,
+            'machine': platform.machine(),
+            'cv2_version': cv2.__version__,
+            'cv2_mtime': os.path.getmtime(cv2.__file__),
+            'cuda_devices': cuda_devices,
+            'ffmpeg_path': ffmpeg,
+            'ffmpeg_mtime': ffmpeg_mtime,
+            'nvidia_driver': nvidia_driver
+        }
+    
+    def _load_cache(self) -> bool:
+        """
+        Load capabilities from CAPABILITIES_CACHE_FILE.
+        
+        Results older than CAPABILITIES_CACHE_TTL are detected again.
+        
+        Returns:
+            bool: True if a valid cached result was loaded
+        """
+        try:
+            with open(CAPABILITIES_CACHE_FILE, 'r') as f:
+                cached = json.load(f)
+            
+            if not 0 <= time.time() - cached['created'] < CAPABILITIES_CACHE_TTL:
+                return False
+            
+            if cached.get('key') != self._cache_key():
+                return False
+            
+            for field in self._CACHED_FIELDS:
+                setattr(self, field, cached['capabilities'][field])
+            
+            logger.info(f"Loaded hardware capabilities from {CAPABILITIES_CACHE_FILE}")
+            return True
+            
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+    
+    def _save_cache(self):
+        """Persist capabilities to CAPABILITIES_CACHE_FILE (best effort)."""
+        try:
+            payload = {
+                'key': self._cache_key(),
+                'created': time.time(),
+                'capabilities': {field: getattr(self, field) for field in self._CACHED_FIELDS}
+            }
+            
+            os.makedirs(os.path.dirname(CAPABILITIES_CACHE_FILE), exist_ok=True)
+            temp_file = f"{CAPABILITIES_CACHE_FILE}.{os.getpid()}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(payload, f)
+            os.replace(temp_file, CAPABILITIES_CACHE_FILE)
+            
+        except Exception as e:
+            logger.debug(f"Could not persist hardware capabilities: {e}")
     
     def _detect_capabilities(self):
         """Detect available hardware encoding capabilities."""
@@ -42,14 +472,23 @@ class HardwareCapabilities:
             except:
                 self.cuda_available = False
             
-            # Check NVENC availability (requires NVIDIA GPU with NVENC support)
-            self.nvenc_available = self._check_nvenc()
-            
-            # Check Intel Quick Sync availability
-            self.quicksync_available = self._check_quicksync()
-            
-            # Check VA-API availability (Linux)
-            self.vaapi_available = self._check_vaapi()
+            encoders = self._probe_ffmpeg_encoders()
+            if encoders is not None:
+                # One ffmpeg query covers NVENC, Quick Sync and VA-API; an encoder
+                # only counts if ffmpeg can also create its hardware device type
+                hw_devices = self._probe_ffmpeg_hw_devices()
+                self.nvenc_available = 'h264_nvenc' in encoders and 'cuda' in hw_devices
+                self.quicksync_available = 'h264_qsv' in encoders and 'qsv' in hw_devices
+                self.vaapi_available = 'h264_vaapi' in encoders and 'vaapi' in hw_devices
+            else:
+                # Check NVENC availability (requires NVIDIA GPU with NVENC support)
+                self.nvenc_available = self._check_nvenc()
+                
+                # Check Intel Quick Sync availability
+                self.quicksync_available = self._check_quicksync()
+                
+                # Check VA-API availability (Linux)
+                self.vaapi_available = self._check_vaapi()
             
             logger.info(f"Hardware capabilities - NVENC: {self.nvenc_available}, "
                        f"QuickSync: {self.quicksync_available}, "
@@ -59,8 +498,13 @@ class HardwareCapabilities:
         except Exception as e:
             logger.error(f"Error detecting hardware capabilities: {e}")
     
-    def _detect_codecs(self):
-        """Detect available video codecs with preference for NVENC."""
+    def _detect_codecs(self, codecs: Optional[List[str]] = None):
+        """
+        Detect available video codecs with preference for NVENC.
+        
+        Args:
+            codecs (Optional[List[str]]): Restrict probing to these codec names
+        """
         try:
             import cv2
             
@@ -83,73 +527,81 @@ class HardwareCapabilities:
                 'AV1': ['AV01'],
             }
             
+            if codecs is not None:
+                hardware_codec_tests = {name: fourccs for name, fourccs in hardware_codec_tests.items()
+                                        if name in codecs}
+                software_codec_tests = {name: fourccs for name, fourccs in software_codec_tests.items()
+                                        if name in codecs}
+            
+            # (codec name, variant) pairs already recorded, for O(1) duplicate checks
+            seen: Set[Tuple[str, CodecInfo]] = set()
+            
             # Test hardware codecs first
             if self.nvenc_available:
                 for codec_name, fourccs in hardware_codec_tests.items():
                     for fourcc_str in fourccs:
                         # For NVENC, test with mp4 format
-                        if self._test_codec_nvenc(fourcc_str, 'mp4'):
+                        if self._probe(fourcc_str, 'mp4', backend=cv2.CAP_FFMPEG, write_frame=True):
                             if codec_name not in self.available_codecs:
                                 self.available_codecs[codec_name] = []
                             
-                            codec_info = {
-                                'fourcc': fourcc_str,
-                                'format': 'mp4',
-                                'hardware_support': True
-                            }
+                            codec_info = CodecInfo(fourcc_str, 'mp4', True)
                             
-                            if codec_info not in self.available_codecs[codec_name]:
-                                self.available_codecs[codec_name].append(codec_info)
+                            if (codec_name, codec_info) not in seen:
+                                seen.add((codec_name, codec_info))
+                                self.available_codecs[codec_name].append(codec_info.to_dict())
                                 logger.info(f"  {codec_name}: {fourcc_str} (mp4) [HW]")
             
             # Test software codecs
             formats = ['mp4', 'avi', 'mkv', 'webm', 'mov']
+            alt_h264_tests = ['AVC1', 'X264']
+            alt_h264_formats = ['mp4', 'mov']
+            
+            probes = [(fourcc_str, fmt)
+                      for fourccs in software_codec_tests.values()
+                      for fourcc_str in fourccs
+                      for fmt in formats]
+            if 'H264' not in self.available_codecs and (codecs is None or 'H264' in codecs):
+                probes.extend((fourcc_str, fmt)
+                              for fourcc_str in alt_h264_tests
+                              for fmt in alt_h264_formats)
+            probe_results = self._probe_software_codecs(probes)
+            
             for codec_name, fourccs in software_codec_tests.items():
                 for fourcc_str in fourccs:
                     for fmt in formats:
-                        if self._test_codec_software(fourcc_str, fmt):
+                        if probe_results.get((fourcc_str, fmt)):
                             if codec_name not in self.available_codecs:
                                 self.available_codecs[codec_name] = []
                             
-                            codec_info = {
-                                'fourcc': fourcc_str,
-                                'format': fmt,
-                                'hardware_support': False
-                            }
+                            codec_info = CodecInfo(fourcc_str, fmt, False)
                             
-                            if codec_info not in self.available_codecs[codec_name]:
-                                self.available_codecs[codec_name].append(codec_info)
+                            if (codec_name, codec_info) not in seen:
+                                seen.add((codec_name, codec_info))
+                                self.available_codecs[codec_name].append(codec_info.to_dict())
                                 logger.info(f"  {codec_name}: {fourcc_str} ({fmt}) [SW]")
                             break  # Found working combination for this codec
             
             # Add fallback software H.264 if hardware failed (but avoid OpenH264)
-            if 'H264' not in self.available_codecs:
+            if 'H264' not in self.available_codecs and (codecs is None or 'H264' in codecs):
                 # Try alternative H.264 codecs that don't use OpenH264
-                alt_h264_tests = ['AVC1', 'X264']
                 for fourcc_str in alt_h264_tests:
-                    for fmt in ['mp4', 'mov']:
-                        if self._test_codec_software(fourcc_str, fmt):
+                    for fmt in alt_h264_formats:
+                        if probe_results.get((fourcc_str, fmt)):
                             if 'H264' not in self.available_codecs:
                                 self.available_codecs['H264'] = []
                             
-                            codec_info = {
-                                'fourcc': fourcc_str,
-                                'format': fmt,
-                                'hardware_support': self._check_hardware_support('H264')
-                            }
-                            
-                            if codec_info not in self.available_codecs['H264']:
-                                self.available_codecs['H264'].append(codec_info)
-                                hw_label = 'HW' if codec_info['hardware_support'] else 'SW'
+                            codec_info = CodecInfo(fourcc_str, fmt, self._check_hardware_support('H264'))
+
+                            if ('H264', codec_info) not in seen:
+                                seen.add(('H264', codec_info))
+                                self.available_codecs['H264'].append(codec_info.to_dict())
+                                hw_label = 'HW' if codec_info.hardware_support else 'SW'
                                 logger.info(f"  H264: {fourcc_str} ({fmt}) [{hw_label}]")
                             break
             
             # Always include JPEG as fallback
-            self.available_codecs['JPEG'] = [{
-                'fourcc': 'JPEG',
-                'format': 'jpg',
-                'hardware_support': self.cuda_available
-            }]
+            self.available_codecs['JPEG'] = [CodecInfo('JPEG', 'jpg', self.cuda_available).to_dict()]
             
             # Log available codecs
             logger.info(f"Available codecs: {list(self.available_codecs.keys())}")
@@ -165,140 +617,52 @@ class HardwareCapabilities:
                 'JPEG': [{'fourcc': 'JPEG', 'format': 'jpg', 'hardware_support': False}]
             }
     
-    def _test_codec_nvenc(self, fourcc_str, fmt):
-        """Test NVENC hardware codec specifically."""
-        try:
-            import cv2
-            import os
-            
-            if not self.nvenc_available:
-                return False
-                
-            test_file = f'nvenc_test.{fmt}'
-            
-            # Create fourcc
-            fourcc = cv2.VideoWriter_fourcc(*fourcc_str)
-            
-            # Test with hardware acceleration hint
-            writer = cv2.VideoWriter(
-                test_file,
-                cv2.CAP_FFMPEG,  # Backend hint for hardware
-                fourcc,
-                30.0,  # fps
-                (640, 480),
-                True
-            )
-            
-            is_opened = writer.isOpened()
-            
-            # Test actual frame writing for hardware validation
-            if is_opened:
-                try:
-                    import numpy as np
-                    test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    test_frame.fill(128)  # Gray frame
-                    success = writer.write(test_frame)
-                    if not success:
-                        is_opened = False
-                except:
-                    is_opened = False
-            
-            writer.release()
-            
-            # Clean up
-            if os.path.exists(test_file):
-                try:
-                    os.remove(test_file)
-                except:
-                    pass
-            
-            return is_opened
+    def _probe_software_codecs(self, probes: List[Tuple[str, str]]) -> Dict[Tuple[str, str], bool]:
+        """
+        Run software codec probes concurrently.
+        
+        Args:
+            probes (List[Tuple[str, str]]): (fourcc, format) combinations to test
             
-        except Exception as e:
-            logger.debug(f"NVENC codec test failed for {fourcc_str}.{fmt}: {e}")
-            return False
+        Returns:
+            Dict[Tuple[str, str], bool]: Probe result for each combination
+        """
+        if not probes:
+            return {}
+        
+        workers = min(CODEC_PROBE_WORKERS, len(probes))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='codec-probe') as executor:
+            results = executor.map(lambda probe: self._probe(*probe), probes)
+            return dict(zip(probes, results))
     
-    def _test_codec_software(self, fourcc_str, fmt):
-        """Test software codec without triggering hardware dependencies."""
-        try:
-            import cv2
-            import os
-            
-            # Skip codecs that might trigger OpenH264 issues
-            problematic_codecs = ['H264', 'AVC1', 'X264']
-            if fourcc_str in problematic_codecs:
-                # Only test these if we explicitly want software fallback
-                # and we're not using OpenH264
-                pass
-            
-            test_file = f'sw_test.{fmt}'
-            
-            # Create fourcc
-            fourcc = cv2.VideoWriter_fourcc(*fourcc_str)
-            
-            # Test writer creation with explicit software backend
-            writer = cv2.VideoWriter(
-                test_file,
-                fourcc,
-                30.0,  # fps
-                (640, 480),
-                True
-            )
-            
-            is_opened = writer.isOpened()
-            writer.release()
-            
-            # Clean up
-            if os.path.exists(test_file):
-                try:
-                    os.remove(test_file)
-                except:
-                    pass
-            
-            return is_opened
+    def _probe(self, fourcc_str: str, fmt: str, backend: Optional[int] = None,
+               write_frame: bool = False) -> bool:
+        """
+        Test whether a codec/container combination can be written.
+        
+        Args:
+            fourcc_str (str): Four character codec code
+            fmt (str): Container file extension
+            backend (Optional[int]): VideoWriter backend (e.g. cv2.CAP_FFMPEG), or None for automatic selection
+            write_frame (bool): Also encode a frame and check that output was produced
             
-        except Exception as e:
-            logger.debug(f"Software codec test failed for {fourcc_str}.{fmt}: {e}")
-            return False
-    
-    def _test_codec(self, fourcc_str: str, format_ext: str) -> bool:
-        """Test if a codec/format combination works."""
+        Returns:
+            bool: True if the combination works
+        """
         try:
-            import cv2
-            import os
-            import tempfile
-            
-            # Create temporary file
-            temp_file = os.path.join(tempfile.gettempdir(), f'test_codec.{format_ext}')
-            
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*fourcc_str)
-                writer = cv2.VideoWriter(temp_file, fourcc, 30.0, (320, 240))
+            with _probe_writer(fourcc_str, fmt, api_preference=backend) as writer:
+                if not writer.isOpened():
+                    return False
+                if not write_frame:
+                    return True
                 
-                if writer.isOpened():
-                    # Create a test frame
-                    test_frame = np.zeros((240, 320, 3), dtype=np.uint8)
-                    writer.write(test_frame)
-                    writer.release()
-                    
-                    # Check if file was created and has reasonable size
-                    if os.path.exists(temp_file) and os.path.getsize(temp_file) > 100:
-                        os.remove(temp_file)
-                        return True
-                
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-                return False
+                # VideoWriter.write() returns nothing, so check the file instead
+                writer.write(np.full((480, 640, 3), 128, dtype=np.uint8))
+                writer.release()
+                return os.path.getsize(writer.path) > 100
                 
-            except Exception:
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
-                return False
-                
-        except Exception:
+        except Exception as e:
+            logger.debug(f"Codec test failed for {fourcc_str}.{fmt}: {e}")
             return False
     
     def _check_hardware_support(self, codec_name: str) -> bool:
@@ -315,6 +679,10 @@ class HardwareCapabilities:
     
     def get_best_codec(self, prefer_hardware: bool = True) -> Dict[str, Any]:
         """Get the best available codec based on preferences."""
+        return dict(self._best_codecs[bool(prefer_hardware)])
+    
+    def _select_best_codec(self, prefer_hardware: bool) -> Dict[str, Any]:
+        """Select the best available codec from the detected codecs."""
         if not self.available_codecs:
             return {'codec': 'JPEG', 'fourcc': 'JPEG', 'format': 'jpg', 'hardware_support': False}
         
@@ -363,27 +731,65 @@ class HardwareCapabilities:
             }
         return None
     
+    @staticmethod
+    def _run_ffmpeg(*args: str) -> Optional[str]:
+        """
+        Run an ffmpeg query command.
+        
+        Returns:
+            Optional[str]: Command output, or None if ffmpeg is unavailable
+        """
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            return None
+        
+        try:
+            result = subprocess.run([ffmpeg, '-hide_banner', *args],
+                                    capture_output=True, text=True, timeout=3)
+            return result.stdout
+        except Exception as e:
+            logger.debug(f"ffmpeg {' '.join(args)} failed: {e}")
+            return None
+    
+    def _probe_ffmpeg_encoders(self) -> Optional[str]:
+        """
+        List the encoders ffmpeg was built with.
+        
+        Returns:
+            Optional[str]: Output of ``ffmpeg -encoders``, or None if ffmpeg is unavailable
+        """
+        return self._run_ffmpeg('-encoders')
+    
+    def _probe_ffmpeg_hw_devices(self) -> List[str]:
+        """
+        List the hardware device types ffmpeg supports.
+        
+        Returns:
+            List[str]: Device type names such as 'cuda', 'qsv' or 'vaapi'
+        """
+        output = self._run_ffmpeg('-init_hw_device', 'list') or ''
+        lines = [line.strip() for line in output.splitlines()]
+        return [line for line in lines if line and not line.endswith(':')]
+    
     def _check_nvenc(self) -> bool:
         """Check if NVENC is available."""
         try:
             # Try to create NVENC encoder to test availability
-            fourcc = cv2.VideoWriter_fourcc(*'H264')
-            temp_writer = cv2.VideoWriter('temp_test.mp4', fourcc, 30, (640, 480))
-            if temp_writer.isOpened():
-                temp_writer.release()
-                try:
-                    import os
-                    os.remove('temp_test.mp4')
-                except:
-                    pass
-                return True
-            return False
+            with _probe_writer('H264', 'mp4') as writer:
+                return writer.isOpened()
         except Exception as e:
             logger.debug(f"NVENC check failed: {e}")
             return False
     
     def _check_quicksync(self) -> bool:
         """Check if Intel Quick Sync is available."""
+        if sys.platform != 'win32':
+            return False
+        
+        adapters = self._list_display_adapters()
+        if adapters is not None:
+            return any('Intel' in name for name in adapters)
+        
         try:
             # Check for Intel graphics
             result = subprocess.run(['wmic', 'path', 'win32_VideoController', 'get', 'name'], 
@@ -393,6 +799,36 @@ class HardwareCapabilities:
             logger.debug(f"QuickSync check failed: {e}")
             return False
     
+    @staticmethod
+    def _list_display_adapters() -> Optional[List[str]]:
+        """
+        Read display adapter names from the Windows registry.
+        
+        This avoids spawning wmic, which is slow to start and deprecated.
+        
+        Returns:
+            Optional[List[str]]: Adapter driver descriptions, or None if the registry could not be read
+        """
+        try:
+            import winreg
+            
+            names = []
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, DISPLAY_ADAPTER_CLASS_KEY) as class_key:
+                subkey_count = winreg.QueryInfoKey(class_key)[0]
+                for index in range(subkey_count):
+                    subkey_name = winreg.EnumKey(class_key, index)
+                    try:
+                        with winreg.OpenKey(class_key, subkey_name) as adapter_key:
+                            names.append(str(winreg.QueryValueEx(adapter_key, 'DriverDesc')[0]))
+                    except OSError:
+                        # Non-adapter subkeys such as "Properties" have no DriverDesc
+                        continue
+            return names
+            
+        except (ImportError, OSError) as e:
+            logger.debug(f"Display adapter registry query failed: {e}")
+            return None
+    
     def _check_vaapi(self) -> bool:
         """Check if VA-API is available (Linux only)."""
         try:
@@ -404,11 +840,53 @@ class HardwareCapabilities:
         return False
 
 
+class _EncoderResources:
+    """Native resources owned by a HardwareEncoder."""
+    
+    __slots__ = ('writer', 'temp_files')
+    
+    def __init__(self):
+        self.writer: Optional[cv2.VideoWriter] = None
+        self.temp_files: List[Path] = []
+
+
+def _release_encoder_resources(resources: _EncoderResources):
+    """
+    Release an encoder's writers and remove their output files.
+    
+    Runs from HardwareEncoder.cleanup() and from the encoder's finalizer, so
+    it only touches the resources object, never the encoder itself, and is
+    safe to call more than once.
+    
+    Args:
+        resources (_EncoderResources): Resources to release
+    """
+    if resources.writer is not None:
+        resources.writer.release()
+        resources.writer = None
+    
+    # Remove the output files of the writers the encoder opened
+    try:
+        for temp_file in resources.temp_files:
+            temp_file.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not remove encoder output file: {e}")
+    resources.temp_files.clear()
+
+
 class HardwareEncoder:
     """Hardware-accelerated video encoder with codec selection support."""
     
+    __slots__ = ('width', 'height', 'fps', 'bitrate', 'requested_codec', 'capabilities',
+                 'optimize_huffman', 'progressive', 'encoding_method', 'current_codec_info',
+                 '_lock', '_resources', '_finalizer', '_jpeg_params', '_encode_times',
+                 '_encode_time_head', '_encode_time_count', '_encode_time_sum', 'frames_encoded',
+                 '__weakref__')
+    
     def __init__(self, width: int = 1920, height: int = 1080, fps: int = 60, 
-                 bitrate: int = 8000000, codec: str = 'auto'):  # 8 Mbps default
+                 bitrate: int = 8000000, codec: str = 'auto',  # 8 Mbps default
+                 capabilities: Optional[HardwareCapabilities] = None,
+                 optimize_huffman: bool = False, progressive: bool = False):
         """
         Initialize hardware encoder.
         
@@ -418,26 +896,83 @@ class HardwareEncoder:
             fps (int): Frames per second
             bitrate (int): Target bitrate in bits per second
             codec (str): Codec to use ('auto', 'H264', 'H265', 'VP8', 'VP9', 'MJPG', 'JPEG')
+            capabilities (Optional[HardwareCapabilities]): Capabilities to select from
+                (defaults to the shared, fully detected instance)
+            optimize_huffman (bool): Build optimal Huffman tables for JPEG output
+                (slightly smaller frames for a second pass over the coefficients)
+            progressive (bool): Emit progressive JPEG (slower to encode and not
+                displayable until fully received, so off for live streaming)
         """
         self.width = width
         self.height = height
         self.fps = fps
         self.bitrate = bitrate
         self.requested_codec = codec
+        self.optimize_huffman = optimize_huffman
+        self.progressive = progressive
         
-        self.capabilities = HardwareCapabilities()
-        self.encoder = None
+        self.capabilities = capabilities or get_hardware_capabilities()
         self.encoding_method = None
         self.current_codec_info = None
         self._lock = threading.Lock()
         
-        # Performance tracking
-        self.encode_times = []
+        # Writers and output files live outside the encoder so a finalizer can
+        # release them if cleanup() is never called
+        self._resources = _EncoderResources()
+        self._finalizer = weakref.finalize(self, _release_encoder_resources, self._resources)
+        
+        # imencode parameter lists, built once per quality level
+        self._jpeg_params: Dict[int, List[int]] = {}
+        
+        # Performance tracking: ring of recent encode durations (nanoseconds)
+        # with a running sum so the average is O(1)
+        self._encode_times = np.zeros(ENCODE_TIME_WINDOW, dtype=np.int64)
+        self._encode_time_head = 0
+        self._encode_time_count = 0
+        self._encode_time_sum = 0
         self.frames_encoded = 0
         
+        # Warn once if the CPU JPEG fallback will run without SIMD
+        if _get_turbojpeg() is None:
+            check_jpeg_simd()
+        
         # Initialize the best available encoder
         self._init_encoder()
     
+    @property
+    def encoder(self) -> Optional[cv2.VideoWriter]:
+        """VideoWriter used for video codecs (None for JPEG)."""
+        return self._resources.writer
+    
+    @encoder.setter
+    def encoder(self, writer: Optional[cv2.VideoWriter]):
+        self._resources.writer = writer
+    
+    @classmethod
+    def for_codec(cls, codec: str, width: int = 1920, height: int = 1080, fps: int = 60,
+                  bitrate: int = 8000000) -> 'HardwareEncoder':
+        """
+        Create an encoder for a known codec without a full capability sweep.
+        
+        Unless capabilities are already detected or cached on disk, only the
+        requested codec is probed.
+        
+        Args:
+            codec (str): Codec to use ('auto' falls back to full detection)
+            width (int): Video width
+            height (int): Video height
+            fps (int): Frames per second
+            bitrate (int): Target bitrate in bits per second
+            
+        Returns:
+            HardwareEncoder: Encoder instance
+        """
+        if codec == 'auto' or _capabilities is not None:
+            return cls(width, height, fps, bitrate, codec)
+        
+        return cls(width, height, fps, bitrate, codec,
+                   capabilities=HardwareCapabilities(codecs=[codec]))
+    
     def _init_encoder(self):
         """Initialize encoder based on codec selection."""
         try:
@@ -472,16 +1007,11 @@ class HardwareEncoder:
             codec_info = self.current_codec_info
             logger.info(f"Initializing hardware encoder for {codec_info['codec']}...")
             
-            fourcc = cv2.VideoWriter_fourcc(*codec_info['fourcc'])
+            fourcc = _fourcc(codec_info['fourcc'])
             temp_file = f'temp_hw_{codec_info["codec"].lower()}.{codec_info["format"]}'
             
-            self.encoder = cv2.VideoWriter(
-                temp_file,
-                fourcc,
-                float(self.fps),
-                (self.width, self.height),
-                True
-            )
+            with _ffmpeg_writer_options(self._hardware_writer_options(codec_info['codec'])):
+                self.encoder = self._open_writer(temp_file, fourcc)
             
             if self.encoder.isOpened():
                 self.encoding_method = f"{codec_info['codec']} (Hardware)"
@@ -498,16 +1028,11 @@ class HardwareEncoder:
                 if h264_info and h264_info['hardware_support']:
                     self.current_codec_info = h264_info
                     try:
-                        fourcc = cv2.VideoWriter_fourcc(*h264_info['fourcc'])
+                        fourcc = _fourcc(h264_info['fourcc'])
                         temp_file = f'temp_hw_h264.{h264_info["format"]}'
                         
-                        self.encoder = cv2.VideoWriter(
-                            temp_file,
-                            fourcc,
-                            float(self.fps),
-                            (self.width, self.height),
-                            True
-                        )
+                        with _ffmpeg_writer_options(self._hardware_writer_options('H264')):
+                            self.encoder = self._open_writer(temp_file, fourcc)
                         
                         if self.encoder.isOpened():
                             self.encoding_method = f"{h264_info['codec']} (Hardware)"
@@ -518,22 +1043,51 @@ class HardwareEncoder:
             
             self._init_software_video_encoder()
     
+    def _open_writer(self, path: str, fourcc: int) -> cv2.VideoWriter:
+        """
+        Open a VideoWriter at the encoder's size and rate.
+        
+        The output path is remembered so cleanup() can remove it.
+        
+        Args:
+            path (str): Output file path
+            fourcc (int): Packed fourcc code
+            
+        Returns:
+            cv2.VideoWriter: Writer (check isOpened())
+        """
+        self._resources.temp_files.append(Path(path))
+        return cv2.VideoWriter(path, fourcc, float(self.fps), (self.width, self.height), True)
+    
+    def _hardware_writer_options(self, codec_name: str) -> Optional[str]:
+        """
+        Get FFmpeg writer options that select NVENC for a codec.
+        
+        Without them OpenCV lets FFmpeg pick its default encoder, which for
+        H.264/H.265 is usually the software x264/x265.
+        
+        Args:
+            codec_name (str): Codec name ('H264' or 'H265')
+            
+        Returns:
+            Optional[str]: OPENCV_FFMPEG_WRITER_OPTIONS value, or None if NVENC does not apply
+        """
+        encoder = NVENC_ENCODERS.get(codec_name)
+        if not encoder or not self.capabilities.nvenc_available:
+            return None
+        
+        return f'video_codec;{encoder}|{NVENC_WRITER_OPTIONS}'
+    
     def _init_software_video_encoder(self):
         """Initialize software video encoder with fallback support."""
         try:
             codec_info = self.current_codec_info
             logger.info(f"Initializing software encoder for {codec_info['codec']}...")
             
-            fourcc = cv2.VideoWriter_fourcc(*codec_info['fourcc'])
+            fourcc = _fourcc(codec_info['fourcc'])
             temp_file = f'temp_sw_{codec_info["codec"].lower()}.{codec_info["format"]}'
             
-            self.encoder = cv2.VideoWriter(
-                temp_file,
-                fourcc,
-                float(self.fps),
-                (self.width, self.height),
-                True
-            )
+            self.encoder = self._open_writer(temp_file, fourcc)
             
             if self.encoder.isOpened():
                 self.encoding_method = f"{codec_info['codec']} (Software)"
@@ -550,16 +1104,10 @@ class HardwareEncoder:
                 if h264_info:
                     self.current_codec_info = h264_info
                     try:
-                        fourcc = cv2.VideoWriter_fourcc(*h264_info['fourcc'])
+                        fourcc = _fourcc(h264_info['fourcc'])
                         temp_file = f'temp_sw_h264.{h264_info["format"]}'
                         
-                        self.encoder = cv2.VideoWriter(
-                            temp_file,
-                            fourcc,
-                            float(self.fps),
-                            (self.width, self.height),
-                            True
-                        )
+                        self.encoder = self._open_writer(temp_file, fourcc)
                         
                         if self.encoder.isOpened():
                             self.encoding_method = f"{h264_info['codec']} (Software)"
@@ -592,23 +1140,13 @@ class HardwareEncoder:
             logger.info("Initializing NVIDIA NVENC encoder...")
             
             # Use H.264 NVENC
-            fourcc = cv2.VideoWriter_fourcc(*'H264')
-            
-            # Create temporary file for testing
-            self.encoder = cv2.VideoWriter()
+            fourcc = _fourcc('H264')
             
-            # Set codec parameters for NVENC
             # Note: OpenCV doesn't directly expose NVENC parameters,
             # but we can use GPU memory and optimized settings
-            success = self.encoder.open(
-                'temp_nvenc.mp4',
-                fourcc,
-                float(self.fps),
-                (self.width, self.height),
-                True
-            )
+            self.encoder = self._open_writer('temp_nvenc.mp4', fourcc)
             
-            if success:
+            if self.encoder.isOpened():
                 self.encoding_method = 'NVENC'
                 logger.info(f"NVENC encoder initialized: {self.width}x{self.height}@{self.fps}fps")
             else:
@@ -624,15 +1162,9 @@ class HardwareEncoder:
             logger.info("Initializing Intel Quick Sync encoder...")
             
             # Use H.264 with Intel optimizations
-            fourcc = cv2.VideoWriter_fourcc(*'H264')
+            fourcc = _fourcc('H264')
             
-            self.encoder = cv2.VideoWriter(
-                'temp_quicksync.mp4',
-                fourcc,
-                float(self.fps),
-                (self.width, self.height),
-                True
-            )
+            self.encoder = self._open_writer('temp_quicksync.mp4', fourcc)
             
             self.encoding_method = 'QuickSync'
             logger.info(f"QuickSync encoder initialized: {self.width}x{self.height}@{self.fps}fps")
@@ -641,124 +1173,165 @@ class HardwareEncoder:
             logger.error(f"QuickSync encoder initialization failed: {e}")
             raise
     
-    def encode_frame(self, frame: np.ndarray, quality: int = 90) -> Optional[bytes]:
+    def encode_frame(self, frame: np.ndarray, quality: int = 90,
+                     zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
         """
         Encode a single frame using the selected codec.
         
         Args:
             frame (np.ndarray): Input frame
             quality (int): Encoding quality (1-100)
+            zero_copy (bool): Allow returning a memoryview over the encoder's
+                output buffer instead of copying it into bytes (for consumers
+                such as sockets that accept any bytes-like object)
             
         Returns:
-            Optional[bytes]: Encoded frame data
+            Optional[Union[bytes, memoryview]]: Encoded frame data
         """
         if frame is None or frame.size == 0:
             return None
         
-        encode_start = time.time()
+        encode_start = time.perf_counter_ns()
         
         try:
             with self._lock:
+                if self.current_codec_info['codec'] in ('JPEG', 'MJPG'):
+                    # Still-image codecs go to nvJPEG when a CUDA device is present
+                    encoded = self._encode_nvjpeg(frame, quality)
+                    if encoded is not None:
+                        return encoded
+                
                 if self.current_codec_info['codec'] == 'JPEG':
-                    return self._encode_jpeg(frame, quality)
+                    return self._encode_jpeg(frame, quality, zero_copy)
                 else:
-                    return self._encode_video_frame(frame, quality)
+                    return self._encode_video_frame(frame, quality, zero_copy)
                 
         except Exception as e:
             logger.error(f"Error encoding frame: {e}")
             # Fallback to JPEG
-            return self._encode_jpeg(frame, quality)
+            return self._encode_jpeg(frame, quality, zero_copy)
         finally:
-            encode_time = time.time() - encode_start
-            self.encode_times.append(encode_time)
-            self.frames_encoded += 1
-            
-            # Keep only last 100 measurements
-            if len(self.encode_times) > 100:
-                self.encode_times.pop(0)
+            with self._lock:
+                self._record_encode_time(time.perf_counter_ns() - encode_start)
+    
+    def _record_encode_time(self, duration_ns: int):
+        """Add an encode duration to the statistics ring (caller holds the lock)."""
+        head = self._encode_time_head
+        self._encode_time_sum += duration_ns - int(self._encode_times[head])
+        self._encode_times[head] = duration_ns
+        self._encode_time_head = (head + 1) & (ENCODE_TIME_WINDOW - 1)
+        self._encode_time_count = min(self._encode_time_count + 1, ENCODE_TIME_WINDOW)
+        self.frames_encoded += 1
     
-    def _encode_video_frame(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+    def _encode_video_frame(self, frame: np.ndarray, quality: int,
+                            zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
         """Encode frame using video codec."""
         try:
             # For video codecs, we still use JPEG for streaming compatibility
             # but with optimizations based on the selected codec capabilities
             if self.current_codec_info['hardware_support'] and self.capabilities.cuda_available:
-                return self._encode_cuda_jpeg(frame, quality)
+                return self._encode_cuda_jpeg(frame, quality, zero_copy)
             else:
-                return self._encode_optimized_jpeg(frame, quality)
+                return self._encode_optimized_jpeg(frame, quality, zero_copy)
                 
         except Exception as e:
             logger.error(f"Video frame encoding failed: {e}")
-            return self._encode_jpeg(frame, quality)
-            if len(self.encode_times) > 100:
-                self.encode_times.pop(0)
+            return self._encode_jpeg(frame, quality, zero_copy)
     
-    def _encode_cuda_jpeg(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
-        """Encode JPEG using CUDA acceleration."""
-        try:
-            # Upload frame to GPU memory
-            gpu_frame = cv2.cuda_GpuMat()
-            gpu_frame.upload(frame)
-            
-            # Perform any GPU preprocessing (resize, color conversion, etc.)
-            # Download back to CPU for JPEG encoding
-            cpu_frame = gpu_frame.download()
-            
-            # Use optimized JPEG encoding
-            encode_params = [
-                cv2.IMWRITE_JPEG_QUALITY, quality,
-                cv2.IMWRITE_JPEG_OPTIMIZE, 1,
-                cv2.IMWRITE_JPEG_PROGRESSIVE, 1
-            ]
-            
-            success, encoded_frame = cv2.imencode('.jpg', cpu_frame, encode_params)
+    def _encode_cuda_jpeg(self, frame: np.ndarray, quality: int,
+                          zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
+        """
+        Encode JPEG for CUDA-capable codecs.
+        
+        With nvJPEG the DCT, quantization and Huffman coding run on the GPU.
+        Without it there is no GPU work to do, so the frame is encoded on the
+        CPU rather than making a pointless upload/download round-trip.
+        """
+        encoded = self._encode_nvjpeg(frame, quality)
+        if encoded is not None:
+            return encoded
+        
+        return self._encode_optimized_jpeg(frame, quality, zero_copy)
+    
+    def _encode_nvjpeg(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        """
+        Encode JPEG on the GPU with nvJPEG.
+        
+        Args:
+            frame (np.ndarray): Input BGR frame
+            quality (int): JPEG quality (1-100)
             
-            if success:
-                return encoded_frame.tobytes()
+        Returns:
+            Optional[bytes]: Encoded JPEG data, or None if nvJPEG is unavailable or failed
+        """
+        if not self.capabilities.cuda_available:
             return None
-            
+        
+        nvjpeg = _get_nvjpeg()
+        if nvjpeg is None:
+            return None
+        
+        try:
+            # The nvJPEG handle is not safe for concurrent encodes
+            with _nvjpeg_lock:
+                return nvjpeg.encode(frame, quality)
         except Exception as e:
-            logger.error(f"CUDA JPEG encoding failed: {e}")
-            return self._encode_jpeg(frame, quality)
+            logger.debug(f"nvJPEG encoding failed, falling back to CPU: {e}")
+            return None
     
-    def _encode_optimized_jpeg(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
-        """Encode JPEG with CPU optimizations."""
-        try:
-            # Optimized JPEG parameters
-            encode_params = [
+    def _get_jpeg_params(self, quality: int) -> List[int]:
+        """
+        Get the cached imencode parameters for a quality level.
+        
+        Args:
+            quality (int): JPEG quality (1-100)
+            
+        Returns:
+            List[int]: Parameter list for cv2.imencode
+        """
+        params = self._jpeg_params.get(quality)
+        if params is None:
+            params = [
                 cv2.IMWRITE_JPEG_QUALITY, quality,
-                cv2.IMWRITE_JPEG_OPTIMIZE, 1,        # Optimize Huffman tables
-                cv2.IMWRITE_JPEG_PROGRESSIVE, 1,     # Progressive JPEG
+                cv2.IMWRITE_JPEG_OPTIMIZE, int(self.optimize_huffman),
+                cv2.IMWRITE_JPEG_PROGRESSIVE, int(self.progressive),
                 cv2.IMWRITE_JPEG_RST_INTERVAL, 16    # Restart markers for error resilience
             ]
-            
-            success, encoded_frame = cv2.imencode('.jpg', frame, encode_params)
+            self._jpeg_params[quality] = params
+        return params
+    
+    def _encode_optimized_jpeg(self, frame: np.ndarray, quality: int,
+                               zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
+        """Encode JPEG with CPU optimizations."""
+        # libjpeg-turbo's direct API skips OpenCV's Mat-to-vector copy; it has no
+        # separate Huffman optimization switch (progressive mode always optimizes)
+        if _get_turbojpeg() is not None:
+            return encode_jpeg(frame, quality, progressive=self.progressive, zero_copy=zero_copy)
+        
+        try:
+            success, encoded_frame = cv2.imencode('.jpg', frame, self._get_jpeg_params(quality))
             
             if success:
-                return encoded_frame.tobytes()
+                return _jpeg_output(encoded_frame, zero_copy)
             return None
             
         except Exception as e:
             logger.error(f"Optimized JPEG encoding failed: {e}")
-            return self._encode_jpeg(frame, quality)
+            return self._encode_jpeg(frame, quality, zero_copy)
     
-    def _encode_jpeg(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
+    def _encode_jpeg(self, frame: np.ndarray, quality: int,
+                     zero_copy: bool = False) -> Optional[Union[bytes, memoryview]]:
         """Basic JPEG encoding (fallback)."""
-        try:
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-            success, encoded_frame = cv2.imencode('.jpg', frame, encode_params)
-            
-            if success:
-                return encoded_frame.tobytes()
-            return None
-            
-        except Exception as e:
-            logger.error(f"JPEG encoding failed: {e}")
-            return None
+        return encode_jpeg(frame, quality, zero_copy=zero_copy)
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get encoding performance statistics."""
-        if not self.encode_times:
+        with self._lock:
+            count = self._encode_time_count
+            total_ns = self._encode_time_sum
+            recent = self._encode_times[:count].copy()
+        
+        if not count:
             return {
                 'encoding_method': self.encoding_method or 'Not Initialized',
                 'codec': self.current_codec_info['codec'] if self.current_codec_info else 'Unknown',
@@ -766,11 +1339,17 @@ class HardwareEncoder:
                 'hardware_support': self.current_codec_info['hardware_support'] if self.current_codec_info else False,
                 'frames_encoded': 0,
                 'avg_encode_time': 0,
+                'p50_encode_time': 0,
+                'p99_encode_time': 0,
                 'fps_capability': 0,
                 'available_codecs': list(self.capabilities.available_codecs.keys())
             }
         
-        avg_encode_time = sum(self.encode_times) / len(self.encode_times)
+        # Durations are kept in nanoseconds; report seconds
+        avg_encode_time = total_ns / count / 1e9
+        p50_index = (count - 1) // 2
+        p99_index = (count - 1) * 99 // 100
+        partitioned = np.partition(recent, (p50_index, p99_index))
         fps_capability = 1.0 / avg_encode_time if avg_encode_time > 0 else 0
         
         return {
@@ -780,6 +1359,8 @@ class HardwareEncoder:
             'hardware_support': self.current_codec_info['hardware_support'] if self.current_codec_info else False,
             'frames_encoded': self.frames_encoded,
             'avg_encode_time': avg_encode_time,
+            'p50_encode_time': int(partitioned[p50_index]) / 1e9,
+            'p99_encode_time': int(partitioned[p99_index]) / 1e9,
             'fps_capability': fps_capability,
             'available_codecs': list(self.capabilities.available_codecs.keys()),
             'hardware_available': {
@@ -793,25 +1374,58 @@ class HardwareEncoder:
     def cleanup(self):
         """Clean up encoder resources."""
         try:
-            if self.encoder:
-                self.encoder.release()
-                self.encoder = None
-            
-            # Clean up temporary files
-            import os
-            for temp_file in ['temp_nvenc.mp4', 'temp_quicksync.mp4', 'temp_vaapi.mp4', 'temp_software.mp4']:
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except:
-                    pass
+            # The finalizer stays armed: the release is idempotent and also
+            # covers writers opened if the encoder is used again
+            _release_encoder_resources(self._resources)
                     
         except Exception as e:
             logger.error(f"Error cleaning up encoder: {e}")
+
+
+# Global hardware capabilities instance
+_capabilities: Optional[HardwareCapabilities] = None
+_capabilities_lock = threading.Lock()
+
+
+def get_hardware_capabilities() -> HardwareCapabilities:
+    """
+    Get the process-wide hardware capabilities, detecting them on first use.
+    
+    Returns:
+        HardwareCapabilities: Shared capabilities instance
+    """
+    global _capabilities
     
-    def __del__(self):
-        """Destructor to ensure cleanup."""
-        self.cleanup()
+    capabilities = _capabilities
+    if capabilities is None:
+        with _capabilities_lock:
+            if _capabilities is None:
+                _capabilities = HardwareCapabilities()
+            capabilities = _capabilities
+    
+    return capabilities
+
+
+def refresh_capabilities() -> HardwareCapabilities:
+    """
+    Re-run hardware detection, e.g. after installing drivers or a GPU.
+    
+    Discards both the in-process and the on-disk cached result. Encoders that
+    already exist keep the capabilities they were created with.
+    
+    Returns:
+        HardwareCapabilities: Newly detected capabilities
+    """
+    global _capabilities
+    
+    with _capabilities_lock:
+        try:
+            os.remove(CAPABILITIES_CACHE_FILE)
+        except OSError:
+            pass
+        
+        _capabilities = HardwareCapabilities()
+        return _capabilities
 
 
 # Global hardware encoder instance
@@ -836,7 +1450,7 @@ def get_hardware_encoder(width: int = 1920, height: int = 1080, fps: int = 60, c
     
     with _encoder_lock:
         if _hardware_encoder is None:
-            _hardware_encoder = HardwareEncoder(width, height, fps, codec=codec)
+            _hardware_encoder = HardwareEncoder.for_codec(codec, width, height, fps)
         
         # Recreate if dimensions or codec changed
         elif (_hardware_encoder.width != width or 
@@ -844,7 +1458,7 @@ def get_hardware_encoder(width: int = 1920, height: int = 1080, fps: int = 60, c
               _hardware_encoder.fps != fps or
               _hardware_encoder.requested_codec != codec):
             _hardware_encoder.cleanup()
-            _hardware_encoder = HardwareEncoder(width, height, fps, codec=codec)
+            _hardware_encoder = HardwareEncoder.for_codec(codec, width, height, fps)
     
     return _hardware_encoder
 
@@ -856,8 +1470,7 @@ def get_available_codecs() -> Dict[str, List[Dict[str, Any]]]:
     Returns:
         Dict with codec names and their variants
     """
-    capabilities = HardwareCapabilities()
-    return capabilities.available_codecs
+    return get_hardware_capabilities().available_codecs
 
 
 def cleanup_hardware_encoder():
@@ -8,51 +8,84 @@ and handling camera configurations.
 
 import cv2
 import numpy as np
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, List, Set
 import logging
+import os
 import threading
 import time
-from .device_detector import DeviceDetector
+import weakref
+from .device_detector import DeviceDetector, PREFERRED_BACKEND, open_with_timeout
+from .frame_buffer import FrameRingBuffer
+from .hardware_encoder import encode_jpeg
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SCHED_FIFO priority for capture threads started with realtime=True
+CAPTURE_RT_PRIORITY = 20
+
+# Devices with a running capture thread, across all VideoCapture instances
+_running_captures: Set[int] = set()
+_running_captures_lock = threading.Lock()
+
+
+def _release_capture(handle: List[Optional[cv2.VideoCapture]]):
+    """
+    Release the device held in a VideoCapture's handle.
+    
+    Used by both VideoCapture.release() and its finalizer, so it only touches
+    the handle, never the VideoCapture itself.
+    
+    Args:
+        handle (List[Optional[cv2.VideoCapture]]): Single-item device holder
+    """
+    cap = handle[0]
+    if cap is not None:
+        handle[0] = None
+        cap.release()
+
 
 class VideoCapture:
     """
     Handles video capture from a camera device.
     """
     
-    def __init__(self, device_id: int = 0, quick_init: bool = True):
+    def __init__(self, device_id: int = 0, quick_init: bool = True, raw_jpeg: bool = False):
         """
         Initialize video capture for a specific device.
         
         Args:
             device_id (int): Camera device ID (default: 0)
             quick_init (bool): Use quick initialization without full device detection
+            raw_jpeg (bool): Keep the camera's MJPG frames undecoded so they can be
+                streamed without a decode/re-encode round trip (V4L2 only)
         """
         self.device_id = device_id
-        self.cap: Optional[cv2.VideoCapture] = None
+        self.raw_jpeg = raw_jpeg
+        
+        # The device lives in a holder so the finalizer can release it if
+        # release() is never called
+        self._cap_handle: List[Optional[cv2.VideoCapture]] = [None]
+        self._finalizer = weakref.finalize(self, _release_capture, self._cap_handle)
+        
         self.is_running = False
-        self.current_frame: Optional[np.ndarray] = None
-        self.frame_lock = threading.Lock()
+        self.frame_buffer = FrameRingBuffer()
         self.capture_thread: Optional[threading.Thread] = None
         
+        # Notified after each published frame, for wait_for_frame()
+        self._frame_ready = threading.Condition()
+        
+        # Supported resolutions are probed on first access (see resolutions)
+        self._device_detector: Optional[DeviceDetector] = None
+        self._resolutions: Optional[List[Dict[str, Any]]] = None
+        
         if quick_init:
             # Quick initialization: use standard defaults without device detection
             self.width = 640
             self.height = 480
             self.fps = 30
-            self.resolutions = []
             logger.info(f"Quick init for device {device_id}: {self.width}x{self.height} @ {self.fps}fps")
         else:
             # Full initialization with device detection (slower but more accurate)
-            self.device_detector = DeviceDetector()
-            
-            # Get supported resolutions for this device
-            self.resolutions = self.device_detector.get_supported_resolutions(self.device_id)
-            
             # Set default settings based on supported resolutions
             if self.resolutions:
                 # Use the highest supported resolution (first in the list from our detector)
@@ -61,11 +94,7 @@ class VideoCapture:
                 self.height = best_resolution['height']
                 self.fps = best_resolution['fps']
                 logger.info(f"Using best supported resolution: {self.width}x{self.height} @ {self.fps}fps")
-                
-                # Log available resolutions for debugging
-                logger.info(f"Found {len(self.resolutions)} supported resolutions")
-                for i, res in enumerate(self.resolutions[:3]):  # Show first 3 resolutions
-                    logger.info(f"  Resolution {i+1}: {res['width']}x{res['height']} @ {res['fps']}fps")
+                self._log_resolutions()
             else:
                 # Fallback to standard defaults if no resolutions detected
                 self.width = 640
@@ -73,6 +102,32 @@ class VideoCapture:
                 self.fps = 30
                 logger.warning(f"No supported resolutions found for device {self.device_id}, using defaults: {self.width}x{self.height} @ {self.fps}fps")
         
+    @property
+    def resolutions(self) -> List[Dict[str, Any]]:
+        """Supported resolutions of the device, probed on first access."""
+        if self._resolutions is None:
+            self._device_detector = DeviceDetector()
+            self._resolutions = self._device_detector.get_supported_resolutions(self.device_id)
+        return self._resolutions
+    
+    def _log_resolutions(self):
+        """Log the first few supported resolutions at debug level."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
+        logger.debug(f"Found {len(self.resolutions)} supported resolutions")
+        for i, res in enumerate(self.resolutions[:3]):  # Show first 3 resolutions
+            logger.debug(f"  Resolution {i+1}: {res['width']}x{res['height']} @ {res['fps']}fps")
+    
+    @property
+    def cap(self) -> Optional[cv2.VideoCapture]:
+        """Underlying OpenCV capture device, or None if not opened."""
+        return self._cap_handle[0]
+    
+    @cap.setter
+    def cap(self, cap: Optional[cv2.VideoCapture]):
+        self._cap_handle[0] = cap
+    
     def initialize(self, timeout_ms: int = 2000) -> bool:
         """
         Initialize the camera device.
@@ -85,15 +140,15 @@ class VideoCapture:
         """
         try:
             logger.info(f"Initializing camera device {self.device_id}")
-            self.cap = cv2.VideoCapture(self.device_id)
+            # Bound the open so a busy device can't hang initialization
+            self.cap = open_with_timeout(self.device_id, timeout_s=timeout_ms / 1000.0)
             
-            # Set timeout for faster initialization
-            self.cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms)
-            
-            if not self.cap.isOpened():
+            if self.cap is None or not self.cap.isOpened():
                 logger.error(f"Failed to open camera device {self.device_id}")
                 return False
             
+            self._apply_fourcc()
+            
             # Set default properties
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
@@ -115,6 +170,83 @@ class VideoCapture:
             logger.error(f"Error initializing camera: {e}")
             return False
     
+    def _apply_fourcc(self):
+        """Request MJPG from V4L2 devices so several USB cameras fit the bus bandwidth."""
+        # Must be set before the frame size; unsupported formats are ignored by the driver
+        if PREFERRED_BACKEND == cv2.CAP_V4L2:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        
+        if self.raw_jpeg:
+            self._apply_raw_jpeg()
+    
+    def _apply_raw_jpeg(self):
+        """Have cap.read() return the camera's JPEG bytes, or leave raw mode if it can't."""
+        mjpg = cv2.VideoWriter_fourcc(*'MJPG')
+        if PREFERRED_BACKEND != cv2.CAP_V4L2 or int(self.cap.get(cv2.CAP_PROP_FOURCC)) != mjpg:
+            logger.info(f"Camera device {self.device_id} does not deliver MJPG, decoding frames")
+            self.raw_jpeg = False
+            return
+        
+        # Frames then arrive as 1xN uint8 arrays holding the compressed image
+        if not self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+            logger.info(f"Camera device {self.device_id} cannot pass MJPG through, decoding frames")
+            self.raw_jpeg = False
+            return
+        
+        logger.info(f"Camera device {self.device_id} passing MJPG frames through without decoding")
+    
+    def _decoded(self, frame: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Decode a raw MJPG frame to BGR for callers that need pixels."""
+        if frame is None or not self.raw_jpeg:
+            return frame
+        return cv2.imdecode(frame, cv2.IMREAD_COLOR)
+    
+    def reopen(self, device_id: int) -> bool:
+        """
+        Switch this capture to another device, reusing the OpenCV handle.
+        
+        cv2.VideoCapture.open() closes the current device and opens the new
+        one on the same backend, which avoids a full teardown and re-init.
+        Continuous capture is resumed if it was running.
+        
+        Args:
+            device_id (int): Camera device ID to switch to
+            
+        Returns:
+            bool: True if the new device was opened, False otherwise (the
+            capture should then be released and recreated)
+        """
+        if self.cap is None:
+            return False
+        
+        was_running = self.is_running
+        self.stop_capture()
+        
+        try:
+            logger.info(f"Reopening capture on camera device {device_id}")
+            if not self.cap.open(device_id, PREFERRED_BACKEND) or not self.cap.isOpened():
+                logger.error(f"Failed to reopen capture on camera device {device_id}")
+                return False
+            
+            self.device_id = device_id
+            self.frame_buffer.clear()
+            
+            # Re-apply the requested settings to the new device
+            self._apply_fourcc()
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            
+        except Exception as e:
+            logger.error(f"Error reopening camera device {device_id}: {e}")
+            return False
+        
+        if was_running:
+            self.start_capture()
+        
+        return True
+    
     def set_resolution(self, width: int, height: int) -> bool:
         """
         Set camera resolution.
@@ -174,10 +306,14 @@ class VideoCapture:
             logger.error(f"Error setting FPS: {e}")
             return False
     
-    def read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+    def read_frame(self, dst: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Read a single frame from the camera.
         
+        Args:
+            dst (Optional[np.ndarray]): Buffer to decode into; reused when its
+                shape and type match the frame, otherwise a new array is returned
+        
         Returns:
             Tuple[bool, Optional[np.ndarray]]: (success, frame)
         """
@@ -185,17 +321,27 @@ class VideoCapture:
             return False, None
         
         try:
-            ret, frame = self.cap.read()
+            if dst is not None:
+                ret, frame = self.cap.read(dst)
+            else:
+                ret, frame = self.cap.read()
             return ret, frame
             
         except Exception as e:
             logger.error(f"Error reading frame: {e}")
             return False, None
     
-    def start_capture(self) -> bool:
+    def start_capture(self, realtime: bool = False, pin_cpu: bool = False) -> bool:
         """
         Start continuous frame capture in a separate thread.
         
+        Args:
+            realtime (bool): Also run the capture thread under SCHED_FIFO
+                (Linux, needs CAP_SYS_NICE) so encoding and request handling
+                can't delay frame reads
+            pin_cpu (bool): Pin the capture thread to a core of its own
+                (Linux) when there are enough cores for every device
+        
         Returns:
             bool: True if capture started successfully, False otherwise
         """
@@ -210,16 +356,67 @@ class VideoCapture:
         self.is_running = True
         self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.capture_thread.start()
+        with _running_captures_lock:
+            _running_captures.add(self.device_id)
+        self._tune_capture_thread(realtime, pin_cpu)
         
         logger.info("Started continuous frame capture")
         return True
     
+    def _tune_capture_thread(self, realtime: bool, pin_cpu: bool):
+        """
+        Optionally pin the capture thread to its own core and raise its priority.
+        
+        Pinned capture threads take cores from the end of the process's CPU
+        set, one per device id, leaving at least one core to encoding and the
+        web server. Devices never share a core: pinning is skipped when the
+        running devices (or this device's id) would need more cores than that.
+        Only supported on Linux; elsewhere the thread keeps the default
+        scheduling.
+        
+        Args:
+            realtime (bool): Switch the thread to SCHED_FIFO
+            pin_cpu (bool): Pin the thread to a core of its own
+        """
+        if not hasattr(os, 'sched_setaffinity'):
+            return
+        
+        tid = self.capture_thread.native_id
+        if pin_cpu:
+            try:
+                cpus = sorted(os.sched_getaffinity(0))
+                with _running_captures_lock:
+                    devices = len(_running_captures)
+                
+                if devices >= len(cpus) - 1 or self.device_id >= len(cpus) - 1:
+                    logger.info(f"Not pinning capture thread for device {self.device_id}: "
+                                f"{devices} device(s) for {len(cpus)} CPU(s)")
+                else:
+                    cpu = cpus[-1 - self.device_id]
+                    os.sched_setaffinity(tid, {cpu})
+                    logger.info(f"Capture thread for device {self.device_id} pinned to CPU {cpu}")
+            except OSError as e:
+                logger.debug(f"Could not pin capture thread: {e}")
+        
+        if realtime:
+            try:
+                os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(CAPTURE_RT_PRIORITY))
+                logger.info(f"Capture thread for device {self.device_id} running with SCHED_FIFO")
+            except OSError as e:
+                logger.warning(f"Could not set real-time priority for capture thread: {e}")
+    
     def stop_capture(self):
         """Stop continuous frame capture."""
         if not self.is_running:
             return
         
         self.is_running = False
+        with _running_captures_lock:
+            _running_captures.discard(self.device_id)
+        
+        # Wake anyone blocked in wait_for_frame()
+        with self._frame_ready:
+            self._frame_ready.notify_all()
         
         if self.capture_thread:
             self.capture_thread.join(timeout=1.0)
@@ -231,12 +428,23 @@ class VideoCapture:
         frame_failures = 0
         max_failures = 5  # Allow up to 5 consecutive failures before stopping
         
+        # Bound once: the loop runs for every frame, and cap.read() (which
+        # releases the GIL) should be nearly all the work it does
+        read_frame = self.read_frame
+        next_slot = self.frame_buffer.next_slot
+        commit = self.frame_buffer.commit
+        frame_ready = self._frame_ready
+        
+        # cap.read() blocks until the driver delivers the next frame (with a
+        # one-frame buffer), so no sleep is needed to pace the loop
         while self.is_running:
-            ret, frame = self.read_frame()
+            # Decode straight into the ring slot the frame will be published from
+            ret, frame = read_frame(next_slot())
             
             if ret and frame is not None:
-                with self.frame_lock:
-                    self.current_frame = frame.copy()
+                commit(frame)
+                with frame_ready:
+                    frame_ready.notify_all()
                 frame_failures = 0  # Reset failure count on successful read
             else:
                 frame_failures += 1
@@ -251,20 +459,85 @@ class VideoCapture:
                         self.cap.release()
                         self.cap = None
                     break
-            
-            time.sleep(1.0 / self.fps)  # Control frame rate
+                
+                # Back off before retrying; successful reads are paced by the driver
+                time.sleep(1.0 / self.fps)
+    
+    @property
+    def current_frame(self) -> Optional[np.ndarray]:
+        """Most recent captured frame (read-only view) or None."""
+        return self._decoded(self.frame_buffer.latest()[1])
     
     def get_current_frame(self) -> Optional[np.ndarray]:
         """
         Get the most recent frame from continuous capture.
         
+        The frame is a read-only view into the capture ring buffer; copy it
+        before modifying it or holding on to it for longer than a few frames.
+        In raw_jpeg mode it is decoded on demand instead.
+        
         Returns:
             Optional[np.ndarray]: Current frame or None if not available
         """
-        with self.frame_lock:
-            if self.current_frame is not None:
-                return self.current_frame.copy()
+        return self._decoded(self.frame_buffer.latest()[1])
+    
+    def get_current_frame_jpeg(self, quality: int = 85) -> Optional[bytes]:
+        """
+        Get the most recent frame as JPEG.
+        
+        In raw_jpeg mode this is the camera's own JPEG, returned without
+        decoding or re-encoding (quality is then ignored).
+        
+        Args:
+            quality (int): JPEG quality (1-100) when the frame must be encoded
+            
+        Returns:
+            Optional[bytes]: JPEG data or None if not available
+        """
+        frame = self.frame_buffer.latest()[1]
+        if frame is None:
             return None
+        
+        if self.raw_jpeg:
+            return frame.tobytes()
+        return encode_jpeg(frame, quality)
+    
+    def get_latest_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Get the most recent frame together with its sequence number.
+        
+        The sequence number increases with every captured frame, so callers can
+        cheaply detect whether a new frame arrived since their last call.
+        
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: (sequence, read-only frame or None)
+        """
+        sequence, frame = self.frame_buffer.latest()
+        return sequence, self._decoded(frame)
+    
+    def wait_for_frame(self, sequence: int, timeout: float = 1.0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Wait until a frame newer than the given sequence number is captured.
+        
+        Lets streaming loops block on the capture thread instead of polling.
+        
+        Args:
+            sequence (int): Sequence number of the last frame the caller has
+                seen (-1 for none)
+            timeout (float): Seconds to wait
+            
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: (sequence, frame) of the newest
+            frame, or (sequence, None) on timeout or when capture stops
+        """
+        buffer = self.frame_buffer
+        with self._frame_ready:
+            self._frame_ready.wait_for(lambda: buffer.sequence > sequence or not self.is_running, timeout)
+        
+        latest_sequence, frame = self.get_latest_frame()
+        if latest_sequence <= sequence:
+            return sequence, None
+        return latest_sequence, frame
     
     def is_healthy(self) -> bool:
         """
@@ -332,16 +605,9 @@ class VideoCapture:
     def release(self):
         """Release the camera device and clean up resources."""
         self.stop_capture()
-        
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        _release_capture(self._cap_handle)
         
         logger.info(f"Released camera device {self.device_id}")
-    
-    def __del__(self):
-        """Destructor to ensure proper cleanup."""
-        self.release()
 
 
 def test_video_capture():
@@ -372,4 +638,5 @@ def test_video_capture():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_video_capture()
@@ -4,16 +4,77 @@ AOF Video Stream - Flask Application Factory
 This module contains the Flask application factory and initialization logic.
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO
-from typing import Type, Tuple
+from werkzeug.exceptions import HTTPException
+from typing import Any, Type, Tuple
+from src.camera.hardware_encoder import set_opencv_threads
 from .config import BaseConfig
 from .controllers import register_blueprints
+from .controllers.api import api_error_response
 from .controllers.websocket_controller import init_websocket_streaming
 from .controllers.webrtc_controller import init_webrtc_streaming
 from .models import init_models
 from .views import register_template_filters, register_template_globals
 
+# Optional fast JSON serializer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Templates for errors on page routes; API errors are JSON (see api_error_response)
+_ERROR_TEMPLATES = {
+    403: 'errors/403.html',
+    404: 'errors/404.html',
+    500: 'errors/500.html',
+}
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that serializes with orjson when it is installed.
+    
+    Output matches the default provider (sorted keys, HTTP dates, compact
+    unless debugging) and also accepts numpy arrays and scalars, such as the
+    values in encoder performance stats. Without orjson, or for dumps()
+    arguments orjson has no equivalent for, the default provider is used.
+    """
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        if orjson is None or not kwargs.keys() <= {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, bool(kwargs.get('indent'))).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        """Deserialize data from a JSON string or bytes."""
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """Serialize the arguments as JSON and wrap them in a response."""
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        
+        # Serialize straight to bytes instead of str -> bytes
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._orjson_dumps(obj, indent) + b'\n',
+                                        mimetype=self.mimetype)
+    
+    def _orjson_dumps(self, obj: Any, indent: bool) -> bytes:
+        """Serialize with orjson using the provider's settings."""
+        # Datetimes go through the default provider so they stay HTTP dates
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
 
 def create_app(config: Type[BaseConfig]) -> Tuple[Flask, SocketIO]:
     """
@@ -35,6 +96,7 @@ def create_app(config: Type[BaseConfig]) -> Tuple[Flask, SocketIO]:
     
     # Load configuration
     app.config.from_object(config)
+    set_opencv_threads(app.config.get('HIGH_PARALLEL_JPEG', False))
     
     # Create SocketIO instance
     socketio = SocketIO(
@@ -83,7 +145,8 @@ def init_extensions(app: Flask) -> None:
     """
     # Initialize any Flask extensions here
     # For example: db.init_app(app), migrate.init_app(app), etc.
-    pass
+    app.json = ORJSONProvider(app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', True)
 
 
 def register_error_handlers(app: Flask) -> None:
@@ -94,20 +157,17 @@ def register_error_handlers(app: Flask) -> None:
         app: Flask application instance
     """
     
-    @app.errorhandler(404)
-    def not_found_error(error):
-        """Handle 404 Not Found errors."""
-        return render_template('errors/404.html'), 404
-    
-    @app.errorhandler(500)
-    def internal_error(error):
-        """Handle 500 Internal Server errors."""
-        return render_template('errors/500.html'), 500
-    
-    @app.errorhandler(403)
-    def forbidden_error(error):
-        """Handle 403 Forbidden errors."""
-        return render_template('errors/403.html'), 403
+    @app.errorhandler(HTTPException)
+    def http_error(error):
+        """Serve API errors as pre-serialized JSON and page errors from templates."""
+        response = api_error_response(request.path, error.code)
+        if response is not None:
+            return response
+        
+        template = _ERROR_TEMPLATES.get(error.code)
+        if template is None:
+            return error
+        return render_template(template), error.code
 
 
 def register_cli_commands(app: Flask) -> None:
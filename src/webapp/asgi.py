@@ -0,0 +1,72 @@
+"""
+AOF Video Stream - ASGI Adapter
+
+This module wraps the Flask app for ASGI servers. asgiref's WsgiToAsgi runs
+every request on one shared thread, so a single long-lived MJPEG response
+would hold up every other HTTP request. The adapter here runs requests in
+thread pools instead, with a separate pool for frame and stream requests so
+video viewers can't starve the JSON control endpoints.
+
+Requires the optional ``asgiref`` package.
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+# Request paths served from the video pool (MJPEG streams, frame polls and
+# the system event stream, which also holds its thread while connected)
+_VIDEO_PATH_SUFFIXES = ('/stream', '/frame', '/events')
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    """Single request/response cycle run on a given thread pool."""
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        """
+        Initialize the request instance.
+
+        Args:
+            wsgi_application: WSGI application to call
+            executor (ThreadPoolExecutor): Pool that runs the WSGI call
+        """
+        super().__init__(wsgi_application)
+
+        # Shadows the class-level sync_to_async wrapper, which is bound to
+        # asgiref's single shared thread
+        run_wsgi_app = functools.partial(WsgiToAsgiInstance.run_wsgi_app.func, self)
+        self.run_wsgi_app = SyncToAsync(run_wsgi_app, thread_sensitive=False, executor=executor)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """
+    WSGI-to-ASGI adapter that serves requests from thread pools.
+
+    Each MJPEG viewer holds a video-pool thread for as long as it watches,
+    so the video pool size caps the number of concurrent viewers; further
+    viewers wait for a free thread rather than delaying API requests.
+    """
+
+    def __init__(self, wsgi_application, request_workers: int = 16, video_workers: int = 8):
+        """
+        Initialize the adapter.
+
+        Args:
+            wsgi_application: WSGI application to wrap
+            request_workers (int): Threads for ordinary HTTP requests
+            video_workers (int): Threads for /stream, /frame and /events requests
+        """
+        super().__init__(wsgi_application)
+        self._request_pool = ThreadPoolExecutor(max_workers=request_workers, thread_name_prefix='wsgi')
+        self._video_pool = ThreadPoolExecutor(max_workers=video_workers, thread_name_prefix='mjpeg')
+
+    async def __call__(self, scope, receive, send):
+        """Serve one ASGI HTTP request on the matching thread pool."""
+        if scope.get('path', '').endswith(_VIDEO_PATH_SUFFIXES):
+            executor = self._video_pool
+        else:
+            executor = self._request_pool
+
+        await _PooledWsgiInstance(self.wsgi_application, executor)(scope, receive, send)
@@ -19,11 +19,30 @@ class BaseConfig:
     HOST = os.getenv('HOST', 'localhost')
     PORT = int(os.getenv('PORT', 5000))
     
+    # 'werkzeug' keeps Flask's threaded server (full Socket.IO/WebSocket support);
+    # 'uvicorn' serves the app through an ASGI event loop for many MJPEG viewers
+    SERVER_BACKEND = os.getenv('SERVER_BACKEND', 'werkzeug').lower()
+    
+    # Uvicorn thread pools: API requests, and /stream + /frame requests (each
+    # MJPEG viewer holds one video thread, so this caps concurrent viewers)
+    ASGI_REQUEST_WORKERS = int(os.getenv('ASGI_REQUEST_WORKERS', 16))
+    ASGI_VIDEO_WORKERS = int(os.getenv('ASGI_VIDEO_WORKERS', 8))
+    
     # Camera Settings
     DEFAULT_RESOLUTION = (640, 480)
     DEFAULT_FPS = 30
     MAX_CAMERAS = 10
     
+    # OpenCV runs each encode on one thread so several cameras don't oversubscribe
+    # the CPU; enable to let a single high-resolution camera use every core
+    HIGH_PARALLEL_JPEG = os.getenv('HIGH_PARALLEL_JPEG', 'false').lower() == 'true'
+    
+    # Capture thread scheduling (Linux): pin each capture thread to a core of
+    # its own when there are enough cores, and/or run it under SCHED_FIFO
+    # (needs CAP_SYS_NICE). Both off by default.
+    CAPTURE_PIN_CPU = os.getenv('CAPTURE_PIN_CPU', 'false').lower() == 'true'
+    CAPTURE_REALTIME = os.getenv('CAPTURE_REALTIME', 'false').lower() == 'true'
+    
     # Streaming Settings
     STREAM_QUALITY = 'medium'
     FRAME_BUFFER_SIZE = 10
@@ -36,6 +55,10 @@ class BaseConfig:
     # API Settings
     API_PREFIX = '/api'
     API_VERSION = 'v1'
+    
+    # Sort keys in JSON responses (Flask's default); turning it off skips a
+    # sort of every object when serializing large session/status payloads
+    JSON_SORT_KEYS = True
 
 
 class DevelopmentConfig(BaseConfig):
@@ -64,6 +87,7 @@ class ProductionConfig(BaseConfig):
     # Performance settings for production
     STREAM_QUALITY = 'high'
     DEFAULT_FPS = 30
+    JSON_SORT_KEYS = False
     
     # Security settings - will be validated when app starts
     SECRET_KEY = os.getenv('SECRET_KEY', 'production-secret-key-change-me')
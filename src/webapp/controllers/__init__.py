@@ -4,10 +4,33 @@ AOF Video Stream - Controllers Package
 This package contains request handlers and routing logic for the application.
 """
 
+import importlib
+
 from flask import Flask
-from .main_controller import main_bp
-from .camera_controller import camera_bp
-from .api import register_api_blueprints
+
+# (module, blueprint attribute, url prefix); modules are imported only when
+# the blueprints are registered, not when this package is imported
+_BLUEPRINTS = [
+    ('.main_controller', 'main_bp', None),
+    ('.camera_controller', 'camera_bp', '/camera'),
+]
+
+# Boundary and headers that precede each JPEG in an MJPEG stream (% content length)
+_MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+
+
+def mjpeg_part_header(length: int) -> bytes:
+    """
+    Build the multipart boundary and headers that precede one MJPEG frame.
+    
+    Args:
+        length: Size of the JPEG in bytes
+        
+    Returns:
+        Part header for multipart/x-mixed-replace; boundary=frame
+    """
+    return _MJPEG_PART_HEADER % length
+
 
 def register_blueprints(app: Flask) -> None:
     """
@@ -17,11 +40,11 @@ def register_blueprints(app: Flask) -> None:
         app: Flask application instance
     """
     
-    # Register main routes
-    app.register_blueprint(main_bp)
-    
-    # Register camera routes
-    app.register_blueprint(camera_bp, url_prefix='/camera')
+    # Register main and camera routes
+    for module_name, attribute, url_prefix in _BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name, __name__), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
     
     # Register modular API routes
+    from .api import register_api_blueprints
     register_api_blueprints(app)
@@ -4,14 +4,36 @@ AOF Video Stream - API Package
 This package contains separate API controllers for different system components.
 """
 
-from flask import Blueprint
-from .cameras_api import cameras_bp
-from .streams_api import streams_bp
-from .system_api import system_bp
+import functools
+import hashlib
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import Blueprint, Response, g, make_response, request
+
+from ...models.camera_model import camera_model
+from ...models.stream_model import stream_model
+
+# Optional fast JSON serializer
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Create main API blueprint
 api_bp = Blueprint('api', __name__)
 
+# (module, blueprint attribute, url prefix), imported when registered
+_API_BLUEPRINTS = [
+    ('.cameras_api', 'cameras_bp', '/api/cameras'),
+    ('.streams_api', 'streams_bp', '/api/streams'),
+    ('.system_api', 'system_bp', '/api/system'),
+]
+
 def register_api_blueprints(app):
     """
     Register all API blueprints with the Flask application.
@@ -20,88 +42,437 @@ def register_api_blueprints(app):
         app: Flask application instance
     """
     # Register individual API blueprints
-    app.register_blueprint(cameras_bp, url_prefix='/api/cameras')
-    app.register_blueprint(streams_bp, url_prefix='/api/streams')
-    app.register_blueprint(system_bp, url_prefix='/api/system')
+    for module_name, attribute, url_prefix in _API_BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name, __name__), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
     
     # Register main API blueprint for documentation
     app.register_blueprint(api_bp, url_prefix='/api')
 
-@api_bp.route('/')
-def api_info():
+def _json_bytes(payload) -> bytes:
+    """Serialize a constant payload once, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+def _json_body() -> Any:
     """
-    Get API information and available endpoints.
+    Parse the request's JSON body for an API endpoint.
+    
+    Empty bodies skip parsing entirely, malformed or non-JSON bodies count as
+    empty instead of raising, and the parsed value is not kept on the request.
     
     Returns:
-        JSON response with API information
+        The parsed JSON value, or an empty dict
     """
-    from flask import jsonify
-    
-    api_info = {
-        'name': 'AOF Video Stream API',
-        'version': '1.0.0',
-        'description': 'REST API for camera streaming and management',
-        'endpoints': {
-            'cameras': {
-                'GET /api/cameras': 'Get list of available cameras',
-                'POST /api/cameras/start': 'Start camera streaming',
-                'POST /api/cameras/stop': 'Stop camera streaming',
-                'GET /api/cameras/status': 'Get camera status',
-                'POST /api/cameras/settings': 'Update camera settings',
-                'GET /api/cameras/frame': 'Get latest frame as JPEG',
-                'GET /api/cameras/stream': 'Get video stream',
-                'POST /api/cameras/snapshot': 'Take snapshot'
-            },
-            'streams': {
-                'GET /api/streams': 'Get streaming sessions',
-                'GET /api/streams/status': 'Get streaming status',
-                'GET /api/streams/<session_id>': 'Get specific session info'
-            },
-            'system': {
-                'GET /api/system/status': 'Get system status',
-                'GET /api/system/config': 'Get system configuration',
-                'GET /api/system/health': 'Get system health check'
-            }
-        }
-    }
+    if request.content_length == 0:
+        return {}
+    return request.get_json(silent=True, cache=False) or {}
+
+
+def _positive_int(value: Any) -> int:
+    """Accept a positive integer (not a bool)."""
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError('must be a positive integer')
+    return value
+
+
+def _non_negative_int(value: Any) -> int:
+    """Accept an integer >= 0 (not a bool)."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('must be a non-negative integer')
+    return value
+
+
+def _text(value: Any) -> str:
+    """Accept a string."""
+    if not isinstance(value, str):
+        raise ValueError('must be a string')
+    return value
+
+
+def _resolution(value: Any) -> Tuple[int, int]:
+    """Accept a [width, height] pair of positive integers."""
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError('must be [width, height]')
+    try:
+        return _positive_int(value[0]), _positive_int(value[1])
+    except ValueError:
+        raise ValueError('must be [width, height] as positive integers') from None
+
+
+def _choice(*options: str) -> Callable[[Any], str]:
+    """Build a converter accepting one of the given strings."""
+    allowed = frozenset(options)
+    message = f"must be one of: {', '.join(options)}"
     
-    return jsonify(api_info)
+    def convert(value: Any) -> str:
+        if value not in allowed:
+            raise ValueError(message)
+        return value
+    return convert
 
-# Common error handlers for all API endpoints
-@api_bp.errorhandler(400)
-def api_bad_request(error):
-    """Handle 400 Bad Request errors for API."""
-    from flask import jsonify
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Bad request',
-            'code': 'BAD_REQUEST'
-        }
-    }), 400
+
+class RequestSchema:
+    """
+    Validator for a JSON request body, built once per endpoint.
+    
+    Each field has a converter that returns the validated value or raises
+    ValueError, and a default used when the field is missing or null.
+    Unknown fields are ignored.
+    """
+    
+    __slots__ = ('_fields',)
+    
+    def __init__(self, **fields: Tuple[Callable[[Any], Any], Any]):
+        """
+        Initialize the schema.
+        
+        Args:
+            **fields: Field name -> (converter, default)
+        """
+        self._fields = tuple((name, convert, default) for name, (convert, default) in fields.items())
+    
+    def parse(self, data: Any) -> Dict[str, Any]:
+        """
+        Validate a parsed request body.
+        
+        Args:
+            data: Parsed JSON body
+            
+        Returns:
+            Dict[str, Any]: Validated value or default for every field
+            
+        Raises:
+            ValueError: If the body is not an object or a field is invalid
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Request body must be a JSON object')
+        
+        values = {}
+        for name, convert, default in self._fields:
+            value = data.get(name)
+            if value is None:
+                values[name] = default
+                continue
+            try:
+                values[name] = convert(value)
+            except ValueError as e:
+                raise ValueError(f'{name} {e}') from None
+        return values
 
 
-@api_bp.errorhandler(404)
-def api_not_found(error):
-    """Handle 404 Not Found errors for API."""
-    from flask import jsonify
-    return jsonify({
+def _invalid_request(message: str) -> Tuple[Response, int]:
+    """Build the 400 response for a request body that failed validation."""
+    return Response(_error_body(message, 'INVALID_PARAMETER'), mimetype='application/json'), 400
+
+
+def _error_body(message: str, code: str) -> bytes:
+    """Build the JSON body of a constant API error response."""
+    return _json_bytes({
         'success': False,
         'error': {
-            'message': 'Endpoint not found',
-            'code': 'NOT_FOUND'
+            'message': message,
+            'code': code
         }
-    }), 404
+    })
 
 
-@api_bp.errorhandler(500)
-def api_internal_error(error):
-    """Handle 500 Internal Server errors for API."""
-    from flask import jsonify
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Internal server error',
-            'code': 'INTERNAL_ERROR'
+class ResponseCache:
+    """
+    Single-slot cache for a serialized JSON response body.
+    
+    An entry is reused while it is younger than the TTL and was stored under
+    the same key; the key should include anything the body depends on, such
+    as request arguments or the camera model's state version. Stored
+    responses get an ETag hashed from the body once, when it is stored.
+    """
+    
+    __slots__ = ('ttl', '_entry')
+    
+    def __init__(self, ttl: float):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl (float): Seconds a stored body stays valid
+        """
+        self.ttl = ttl
+        self._entry = None
+    
+    def get(self, key: Any = None) -> Optional[Response]:
+        """
+        Get the cached response for a key.
+        
+        Args:
+            key: Cache key the body must have been stored under
+            
+        Returns:
+            Optional[Response]: JSON response, or None if missing or expired
+        """
+        entry = self._entry
+        if entry is None or entry[0] != key or time.monotonic() - entry[1] >= self.ttl:
+            return None
+        response = Response(entry[2], mimetype='application/json')
+        response.set_etag(entry[3])
+        return response
+    
+    def put(self, response: Response, key: Any = None) -> Response:
+        """
+        Store a successful response's body.
+        
+        Args:
+            response (Response): JSON response to cache
+            key: Cache key
+            
+        Returns:
+            Response: The same response, for returning from the view
+        """
+        if response.status_code == 200:
+            body = response.get_data()
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            response.set_etag(etag)
+            
+            # One tuple store, so concurrent readers never see a partial entry
+            self._entry = (key, time.monotonic(), body, etag)
+        return response
+    
+    def clear(self):
+        """Drop the cached body."""
+        self._entry = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+    
+    While a call for a key is running, further calls with the same key wait
+    for it and get its result (or exception) instead of repeating the work.
+    Nothing is kept once the call finishes.
+    """
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+    
+    def run(self, key: Hashable, operation: Callable[[], Any]) -> Any:
+        """
+        Run an operation, or wait for the identical one already running.
+        
+        Args:
+            key: Identifies the operation and its arguments
+            operation: Callable doing the work
+            
+        Returns:
+            The operation's result
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._calls[key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = operation()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+# Cache misses of cached_response views in progress
+_poll_flights = SingleFlight()
+
+
+class RequestState:
+    """
+    Model state read by one API request, fetched on first use.
+    
+    Handlers that need the camera status, stream status or device list more
+    than once per request (or only for the meta timestamp) read it from here
+    instead of calling the models again.
+    """
+    
+    @functools.cached_property
+    def camera_status(self) -> Dict[str, Any]:
+        """Camera status from camera_model.get_status()."""
+        return camera_model.get_status()
+    
+    @functools.cached_property
+    def stream_status(self) -> Dict[str, Any]:
+        """Streaming status from stream_model.get_stream_status()."""
+        return stream_model.get_stream_status()
+    
+    @functools.cached_property
+    def devices(self) -> List[Dict[str, Any]]:
+        """Camera devices from camera_model.get_devices()."""
+        return camera_model.get_devices()
+    
+    @property
+    def timestamp(self) -> Any:
+        """Last frame time for response metadata."""
+        if 'camera_status' in self.__dict__:
+            return self.camera_status.get('last_frame_time')
+        return camera_model.get_last_frame_time()
+
+
+def request_state() -> RequestState:
+    """
+    Get the current request's RequestState, creating it on first use.
+    
+    Returns:
+        RequestState: State shared by everything handling this request
+    """
+    state = g.get('api_state')
+    if state is None:
+        state = g.api_state = RequestState()
+    return state
+
+
+def _state_version():
+    """Cache key part covering the camera and stream model state."""
+    return camera_model.state_version, stream_model.state_version
+
+
+def cached_response(cache: ResponseCache, version: Optional[Callable[[], Any]] = None,
+                    max_age: Optional[int] = None):
+    """
+    Decorator serving a read-only JSON view from a ResponseCache.
+    
+    Responses are keyed on the query string and, if given, a version
+    callable (such as the camera model's state version) so that state
+    changes miss the cache before the TTL runs out. Only 200 responses are
+    stored. Concurrent requests that miss with the same key run the view
+    once and share its response.
+    
+    Successful responses carry the cached body's ETag, so clients sending
+    If-None-Match get 304 Not Modified, and with max_age a Cache-Control
+    header lets browsers and proxies reuse them without asking at all.
+    
+    Args:
+        cache (ResponseCache): Cache holding the view's last response
+        version: Optional callable returning part of the cache key
+        max_age (Optional[int]): Seconds clients may reuse a response
+        
+    Returns:
+        Decorator for a Flask view function
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.query_string, version() if version is not None else None)
+            cached = cache.get(key)
+            if cached is not None:
+                return _conditional(cached)
+            
+            response = _poll_flights.run(
+                (id(cache), key),
+                lambda: cache.put(make_response(view(*args, **kwargs)), key)
+            )
+            
+            # Every waiter gets its own response object, not the shared one
+            cached = cache.get(key)
+            if cached is not None:
+                return _conditional(cached)
+            return Response(response.get_data(), status=response.status_code, mimetype=response.mimetype)
+        
+        def _conditional(response: Response) -> Response:
+            if max_age is not None:
+                response.cache_control.public = True
+                response.cache_control.max_age = max_age
+            return response.make_conditional(request)
+        
+        return wrapper
+    return decorator
+
+
+_API_INFO = {
+    'name': 'AOF Video Stream API',
+    'version': '1.0.0',
+    'description': 'REST API for camera streaming and management',
+    'endpoints': {
+        'cameras': {
+            'GET /api/cameras': 'Get list of available cameras',
+            'POST /api/cameras/start': 'Start camera streaming',
+            'POST /api/cameras/stop': 'Stop camera streaming',
+            'GET /api/cameras/status': 'Get camera status',
+            'POST /api/cameras/settings': 'Update camera settings',
+            'GET /api/cameras/frame': 'Get latest frame as JPEG',
+            'GET /api/cameras/stream': 'Get video stream',
+            'POST /api/cameras/snapshot': 'Take snapshot'
+        },
+        'streams': {
+            'GET /api/streams': 'Get streaming sessions',
+            'GET /api/streams/status': 'Get streaming status',
+            'GET /api/streams/<session_id>': 'Get specific session info'
+        },
+        'system': {
+            'GET /api/system/status': 'Get system status',
+            'GET /api/system/config': 'Get system configuration',
+            'GET /api/system/health': 'Get system health check',
+            'GET /api/system/bundle': 'Get system status, health and streams in one response',
+            'GET /api/system/events': 'Server-sent events with the bundle data on each change'
         }
-    }), 500
+    }
+}
+
+
+# API info and error payloads never change, so they are serialized once at import
+_API_INFO_BODY = _json_bytes(_API_INFO)
+
+# Error bodies served by the app-level error handler, keyed by
+# (API section prefix, status code); '/api' holds the generic fallbacks
+_API_ERROR_BODIES: Dict[Tuple[str, int], bytes] = {
+    ('/api', 400): _error_body('Bad request', 'BAD_REQUEST'),
+    ('/api', 404): _error_body('Endpoint not found', 'NOT_FOUND'),
+    ('/api', 500): _error_body('Internal server error', 'INTERNAL_ERROR'),
+}
+for _prefix, _noun in (('/api/cameras', 'camera'), ('/api/streams', 'stream'), ('/api/system', 'system')):
+    _API_ERROR_BODIES[(_prefix, 400)] = _error_body(f'Bad request for {_noun} operation', f'{_noun.upper()}_BAD_REQUEST')
+    _API_ERROR_BODIES[(_prefix, 404)] = _error_body(f'{_noun.capitalize()} endpoint not found', f'{_noun.upper()}_NOT_FOUND')
+    _API_ERROR_BODIES[(_prefix, 500)] = _error_body(f'Internal server error in {_noun} operation', f'{_noun.upper()}_INTERNAL_ERROR')
+del _prefix, _noun
+
+
+def api_error_response(path: str, status: int) -> Optional[Response]:
+    """
+    Get the pre-serialized JSON error response for an API request.
+    
+    Args:
+        path (str): Request path
+        status (int): HTTP status code of the error
+        
+    Returns:
+        Optional[Response]: JSON error response, or None if the path is not
+        an API path or the status has no API error body
+    """
+    if path != '/api' and not path.startswith('/api/'):
+        return None
+    
+    # '/api/cameras/frame' -> '/api/cameras'
+    section = '/'.join(path.split('/', 3)[:3])
+    body = _API_ERROR_BODIES.get((section, status)) or _API_ERROR_BODIES.get(('/api', status))
+    if body is None:
+        return None
+    return Response(body, status=status, mimetype='application/json')
+
+
+@api_bp.route('/')
+def api_info():
+    """
+    Get API information and available endpoints.
+    
+    Returns:
+        JSON response with API information
+    """
+    return Response(_API_INFO_BODY, mimetype='application/json')
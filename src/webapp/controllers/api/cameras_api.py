@@ -4,17 +4,49 @@ AOF Video Stream - Cameras API Controller
 This module handles camera-related REST API endpoints.
 """
 
-from flask import Blueprint, request, jsonify
-from typing import Dict, Any
+from flask import Blueprint, Response, request, jsonify
+from typing import Dict, Any, Callable, Hashable
 import logging
+import threading
 
-from ...models.camera_model import camera_model
+from . import ResponseCache, SingleFlight, request_state, _error_body, _json_body
+from .. import mjpeg_part_header
+from ...models.camera_model import camera_model, frame_bus as _frame_bus
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint for camera API routes
 cameras_bp = Blueprint('cameras_api', __name__)
 
+# Device list responses; the list rarely changes between polls
+_devices_cache = ResponseCache(ttl=2.0)
+
+# Codec and encoder responses polled by dashboards. The codec list only
+# changes with the encoder (tracked by the state version); the others carry
+# performance stats, so they are kept for a shorter time
+_codecs_cache = ResponseCache(ttl=5.0)
+_encoding_status_cache = ResponseCache(ttl=1.0)
+_current_codec_cache = ResponseCache(ttl=1.0)
+
+# Camera state changes run one at a time; identical concurrent requests
+# (e.g. a double-clicked Start) share the in-flight call's result
+_mutation_lock = threading.Lock()
+_camera_changes = SingleFlight()
+
+# Settings accepted by POST /settings
+_ALLOWED_SETTINGS = frozenset({'resolution', 'fps', 'quality', 'brightness', 'contrast'})
+
+# Constant error responses, serialized once at import
+_MISSING_CAMERA_INDEX_BODY = _error_body('camera_index is required', 'MISSING_PARAMETER')
+_NO_VALID_SETTINGS_BODY = _error_body('No valid settings provided', 'NO_VALID_SETTINGS')
+_NO_FRAME_BODY = _error_body('No frame available - camera may not be started', 'NO_FRAME_AVAILABLE')
+_SNAPSHOT_NOT_IMPLEMENTED_BODY = _error_body('Snapshot capture not yet implemented', 'NOT_IMPLEMENTED')
+_MISSING_CODEC_BODY = _error_body('Missing codec parameter', 'MISSING_CODEC')
+_CAMERA_STOP_FAILED_BODY = _error_body('Failed to stop camera stream', 'CAMERA_STOP_FAILED')
+_SETTINGS_UPDATE_FAILED_BODY = _error_body('Failed to update camera settings', 'SETTINGS_UPDATE_FAILED')
+_ENCODING_ENABLE_FAILED_BODY = _error_body('Failed to enable hardware encoding', 'ENCODING_ENABLE_ERROR')
+_ENCODING_DISABLE_FAILED_BODY = _error_body('Failed to disable hardware encoding', 'ENCODING_DISABLE_ERROR')
+
 
 @cameras_bp.route('/')
 def get_cameras():
@@ -28,9 +60,16 @@ def get_cameras():
         refresh = request.args.get('refresh', 'false').lower() == 'true'
         quick_scan = request.args.get('quick_scan', 'true').lower() == 'true'
         
+        # Starting or stopping a stream bumps the state version and so misses
+        cache_key = (quick_scan, camera_model.state_version)
+        if not refresh:
+            cached = _devices_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         devices = camera_model.get_devices(refresh=refresh, quick_scan=quick_scan)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': {
                 'cameras': devices,
@@ -39,12 +78,19 @@ def get_cameras():
             'meta': {
                 'refreshed': refresh,
                 'quick_scan': quick_scan,
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
+        # A refreshed body says so in its meta, so it isn't served to plain
+        # requests; dropping the old entry makes them pick up the new devices
+        if refresh:
+            _devices_cache.clear()
+            return response
+        return _devices_cache.put(response, cache_key)
+        
     except Exception as e:
-        logger.error(f"API Error getting cameras: {e}")
+        logger.error("API Error getting cameras: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -63,17 +109,11 @@ def start_camera_stream():
         JSON response with stream information
     """
     try:
-        data = request.get_json() or {}
+        data = _json_body()
         
         # Validate required fields
         if 'camera_index' not in data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'camera_index is required',
-                    'code': 'MISSING_PARAMETER'
-                }
-            }), 400
+            return Response(_MISSING_CAMERA_INDEX_BODY, status=400, mimetype='application/json')
         
         camera_index = data['camera_index']
         resolution = data.get('resolution', [640, 480])
@@ -87,8 +127,12 @@ def start_camera_stream():
             resolution = tuple(resolution)
         
         # Start camera with optimization and codec
-        logger.info(f"Starting camera device {camera_index} at {resolution} {fps}fps (quality: {quality}, codec: {codec}, quick: {quick_start})")
-        success = camera_model.start_stream(camera_index, resolution, fps, quick_start=quick_start, codec=codec)
+        logger.info("Starting camera device %s at %s %sfps (quality: %s, codec: %s, quick: %s)",
+                    camera_index, resolution, fps, quality, codec, quick_start)
+        success = _run_coalesced(
+            ('start', camera_index, resolution, fps, quick_start, codec),
+            lambda: camera_model.start_stream(camera_index, resolution, fps, quick_start=quick_start, codec=codec)
+        )
         
         if success:
             # Get current status
@@ -119,7 +163,7 @@ def start_camera_stream():
             }), 500
         
     except Exception as e:
-        logger.error(f"API Error starting camera: {e}")
+        logger.error("API Error starting camera: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -138,7 +182,7 @@ def stop_camera_stream():
         JSON response confirming stop
     """
     try:
-        success = camera_model.stop_stream()
+        success = _run_coalesced(('stop',), camera_model.stop_stream)
         
         if success:
             return jsonify({
@@ -148,20 +192,14 @@ def stop_camera_stream():
                 },
                 'meta': {
                     'action': 'camera_stopped',
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Failed to stop camera stream',
-                    'code': 'CAMERA_STOP_FAILED'
-                }
-            }), 500
+            return Response(_CAMERA_STOP_FAILED_BODY, status=500, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"API Error stopping camera: {e}")
+        logger.error("API Error stopping camera: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -176,13 +214,16 @@ def get_camera_status_api():
     """
     Get camera status via API.
     
+    Supports conditional GET: the ETag is a hash of the body, and an
+    unchanged status is answered with 304 Not Modified.
+    
     Returns:
         JSON response with camera status
     """
     try:
         status = camera_model.get_status()
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': {
                 'status': status
@@ -191,9 +232,11 @@ def get_camera_status_api():
                 'timestamp': status.get('last_frame_time')
             }
         })
+        response.add_etag()
+        return response.make_conditional(request)
         
     except Exception as e:
-        logger.error(f"API Error getting camera status: {e}")
+        logger.error("API Error getting camera status: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -212,20 +255,13 @@ def update_camera_settings():
         JSON response confirming settings update
     """
     try:
-        data = request.get_json() or {}
+        data = _json_body()
         
         # Validate input data
-        allowed_settings = ['resolution', 'fps', 'quality', 'brightness', 'contrast']
-        settings = {k: v for k, v in data.items() if k in allowed_settings}
+        settings = {k: data[k] for k in data.keys() & _ALLOWED_SETTINGS}
         
         if not settings:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'No valid settings provided',
-                    'code': 'NO_VALID_SETTINGS'
-                }
-            }), 400
+            return Response(_NO_VALID_SETTINGS_BODY, status=400, mimetype='application/json')
         
         # Apply settings (implementation would depend on camera model capabilities)
         success = True  # Placeholder - would implement actual settings update
@@ -239,20 +275,14 @@ def update_camera_settings():
                 },
                 'meta': {
                     'action': 'settings_updated',
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Failed to update camera settings',
-                    'code': 'SETTINGS_UPDATE_FAILED'
-                }
-            }), 500
+            return Response(_SETTINGS_UPDATE_FAILED_BODY, status=500, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"API Error updating camera settings: {e}")
+        logger.error("API Error updating camera settings: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -267,27 +297,33 @@ def get_latest_frame():
     """
     Get latest frame as JPEG via API.
     
+    The ETag identifies the captured frame, so pollers sending If-None-Match
+    get 304 Not Modified until a new frame is captured, without an encode.
+    
     Returns:
         JPEG image or JSON error response
     """
     try:
-        # Get JPEG frame from camera model
-        frame_data = camera_model.get_frame_as_jpeg()
+        sequence = camera_model.get_latest_frame()[0]
+        if sequence >= 0 and request.if_none_match.contains(_frame_etag(sequence)):
+            response = Response(status=304)
+            response.set_etag(_frame_etag(sequence))
+            return response
+        
+        # Latest captured frame, encoded at most once for all viewers
+        sequence, frame_data = _frame_bus.latest()
         
         if frame_data:
-            from flask import Response
-            return Response(frame_data, mimetype='image/jpeg')
+            # Hand the encoded bytes to the server as the single body chunk
+            # (Content-Length is set from them) instead of re-iterating them
+            response = Response(frame_data, mimetype='image/jpeg', direct_passthrough=True)
+            response.set_etag(_frame_etag(sequence))
+            return response
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'No frame available - camera may not be started',
-                    'code': 'NO_FRAME_AVAILABLE'
-                }
-            }), 404
+            return Response(_NO_FRAME_BODY, status=404, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"API Error getting frame: {e}")
+        logger.error("API Error getting frame: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -297,27 +333,91 @@ def get_latest_frame():
         }), 500
 
 
+def _run_coalesced(key: Hashable, operation: Callable[[], Any]) -> Any:
+    """
+    Run a camera state change, coalescing identical concurrent requests.
+    
+    If an operation with the same key is already running, wait for it and
+    return its result instead of repeating the hardware work. Operations
+    with different keys are serialized.
+    
+    Args:
+        key: Identifies the operation and its arguments
+        operation: Callable performing the change
+        
+    Returns:
+        The operation's result
+    """
+    def serialized():
+        with _mutation_lock:
+            return operation()
+    
+    return _camera_changes.run(key, serialized)
+
+
+def _frame_etag(sequence: int) -> str:
+    """Build the ETag of a captured frame (sequences restart with each stream)."""
+    return f'{camera_model.state_version}-{sequence}'
+
+
+def _generate_mjpeg(quality: int):
+    """
+    Yield multipart MJPEG parts until the camera stream stops.
+    
+    Args:
+        quality: JPEG quality (1-100)
+    """
+    sequence = -1
+    try:
+        while True:
+            # Blocks on the capture thread, so parts go out at the capture rate
+            sequence, jpeg = _frame_bus.wait_next(sequence, quality)
+            if jpeg is None:
+                if not camera_model.is_streaming():
+                    break
+                continue
+            
+            # The shared encoder output is sent as its own chunk, uncopied
+            yield mjpeg_part_header(len(jpeg))
+            yield jpeg
+            yield b'\r\n'
+            
+    except Exception as e:
+        logger.error("API Error in MJPEG stream: %s", e)
+
+
 @cameras_bp.route('/stream')
 def get_camera_stream():
     """
     Get video stream via API.
     
+    Streams MJPEG (multipart/x-mixed-replace) over a single connection, one
+    part per captured frame, instead of clients polling /frame.
+    
+    Query Args:
+        quality: JPEG quality (1-100, default 85)
+    
     Returns:
         Video stream or JSON error response
     """
     try:
-        # Implementation would provide video stream
-        # This is a placeholder for Phase 3 implementation
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Video streaming not yet implemented',
-                'code': 'NOT_IMPLEMENTED'
+        if not camera_model.is_streaming():
+            return Response(_NO_FRAME_BODY, status=404, mimetype='application/json')
+        
+        quality = min(max(request.args.get('quality', 85, type=int), 1), 100)
+        
+        return Response(
+            _generate_mjpeg(quality),
+            mimetype='multipart/x-mixed-replace; boundary=frame',
+            headers={
+                'Cache-Control': 'no-cache, no-store, must-revalidate',
+                'Pragma': 'no-cache',
+                'Expires': '0'
             }
-        }), 501
+        )
         
     except Exception as e:
-        logger.error(f"API Error getting stream: {e}")
+        logger.error("API Error getting stream: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -338,16 +438,10 @@ def take_snapshot():
     try:
         # Implementation would capture a snapshot
         # This is a placeholder for Phase 3 implementation
-        return jsonify({
-            'success': False,
-            'error': {
-                'message': 'Snapshot capture not yet implemented',
-                'code': 'NOT_IMPLEMENTED'
-            }
-        }), 501
+        return Response(_SNAPSHOT_NOT_IMPLEMENTED_BODY, status=501, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"API Error taking snapshot: {e}")
+        logger.error("API Error taking snapshot: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -357,19 +451,6 @@ def take_snapshot():
         }), 500
 
 
-# Error handlers specific to cameras API
-@cameras_bp.errorhandler(400)
-def cameras_api_bad_request(error):
-    """Handle 400 Bad Request errors for cameras API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Bad request for camera operation',
-            'code': 'CAMERA_BAD_REQUEST'
-        }
-    }), 400
-
-
 @cameras_bp.route('/encoding/status')
 def get_encoding_status():
     """
@@ -379,19 +460,23 @@ def get_encoding_status():
         JSON response with encoding information
     """
     try:
+        cached = _encoding_status_cache.get(camera_model.state_version)
+        if cached is not None:
+            return cached
+        
         encoding_enabled = camera_model.is_hardware_encoding_enabled()
         performance_stats = camera_model.get_encoding_performance()
         
-        return jsonify({
+        return _encoding_status_cache.put(jsonify({
             'success': True,
             'data': {
                 'hardware_encoding_enabled': encoding_enabled,
                 'performance': performance_stats
             }
-        })
+        }), camera_model.state_version)
         
     except Exception as e:
-        logger.error(f"API Error getting encoding status: {e}")
+        logger.error("API Error getting encoding status: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -410,17 +495,20 @@ def enable_hardware_encoding():
         JSON response with operation result
     """
     try:
-        data = request.get_json() or {}
+        data = _json_body()
         
         # Reinitialize with specific parameters if provided
         width = data.get('width')
         height = data.get('height')
         fps = data.get('fps')
         
-        success = camera_model.set_hardware_encoding(True)
+        def enable():
+            enabled = camera_model.set_hardware_encoding(True)
+            if enabled and (width or height or fps):
+                camera_model.reinitialize_hardware_encoder(width, height, fps)
+            return enabled
         
-        if success and (width or height or fps):
-            camera_model.reinitialize_hardware_encoder(width, height, fps)
+        success = _run_coalesced(('hardware_encoding', True, width, height, fps), enable)
         
         if success:
             performance_stats = camera_model.get_encoding_performance()
@@ -432,16 +520,10 @@ def enable_hardware_encoding():
                 }
             })
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Failed to enable hardware encoding',
-                    'code': 'ENCODING_ENABLE_ERROR'
-                }
-            }), 500
+            return Response(_ENCODING_ENABLE_FAILED_BODY, status=500, mimetype='application/json')
             
     except Exception as e:
-        logger.error(f"API Error enabling hardware encoding: {e}")
+        logger.error("API Error enabling hardware encoding: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -460,7 +542,7 @@ def disable_hardware_encoding():
         JSON response with operation result
     """
     try:
-        success = camera_model.set_hardware_encoding(False)
+        success = _run_coalesced(('hardware_encoding', False), lambda: camera_model.set_hardware_encoding(False))
         
         if success:
             return jsonify({
@@ -470,16 +552,10 @@ def disable_hardware_encoding():
                 }
             })
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Failed to disable hardware encoding',
-                    'code': 'ENCODING_DISABLE_ERROR'
-                }
-            }), 500
+            return Response(_ENCODING_DISABLE_FAILED_BODY, status=500, mimetype='application/json')
             
     except Exception as e:
-        logger.error(f"API Error disabling hardware encoding: {e}")
+        logger.error("API Error disabling hardware encoding: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -504,12 +580,12 @@ def get_encoding_performance():
             'success': True,
             'data': {
                 'performance': performance_stats,
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting encoding performance: {e}")
+        logger.error("API Error getting encoding performance: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -528,19 +604,23 @@ def get_available_codecs():
         JSON response with available codecs
     """
     try:
+        cached = _codecs_cache.get(camera_model.state_version)
+        if cached is not None:
+            return cached
+        
         available_codecs = camera_model.get_available_codecs()
         current_codec = camera_model.get_current_codec_info()
         
-        return jsonify({
+        return _codecs_cache.put(jsonify({
             'success': True,
             'data': {
                 'available_codecs': available_codecs,
                 'current_codec': current_codec
             }
-        })
+        }), camera_model.state_version)
         
     except Exception as e:
-        logger.error(f"API Error getting available codecs: {e}")
+        logger.error("API Error getting available codecs: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -561,15 +641,9 @@ def set_codec():
         JSON response with operation result
     """
     try:
-        data = request.get_json()
+        data = _json_body()
         if not data or 'codec' not in data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Missing codec parameter',
-                    'code': 'MISSING_CODEC'
-                }
-            }), 400
+            return Response(_MISSING_CODEC_BODY, status=400, mimetype='application/json')
         
         codec = data['codec']
         
@@ -584,7 +658,7 @@ def set_codec():
                 }
             }), 400
         
-        success = camera_model.set_codec(codec)
+        success = _run_coalesced(('codec', codec), lambda: camera_model.set_codec(codec))
         
         if success:
             current_codec = camera_model.get_current_codec_info()
@@ -608,7 +682,7 @@ def set_codec():
             }), 500
             
     except Exception as e:
-        logger.error(f"API Error setting codec: {e}")
+        logger.error("API Error setting codec: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -627,19 +701,23 @@ def get_current_codec():
         JSON response with current codec information
     """
     try:
+        cached = _current_codec_cache.get(camera_model.state_version)
+        if cached is not None:
+            return cached
+        
         current_codec = camera_model.get_current_codec_info()
         performance_stats = camera_model.get_encoding_performance()
         
-        return jsonify({
+        return _current_codec_cache.put(jsonify({
             'success': True,
             'data': {
                 'current_codec': current_codec,
                 'performance': performance_stats
             }
-        })
+        }), camera_model.state_version)
         
     except Exception as e:
-        logger.error(f"API Error getting current codec: {e}")
+        logger.error("API Error getting current codec: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -647,27 +725,3 @@ def get_current_codec():
                 'code': 'CODEC_GET_ERROR'
             }
         }), 500
-
-
-@cameras_bp.errorhandler(404)
-def cameras_api_not_found(error):
-    """Handle 404 Not Found errors for cameras API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Camera endpoint not found',
-            'code': 'CAMERA_NOT_FOUND'
-        }
-    }), 404
-
-
-@cameras_bp.errorhandler(500)
-def cameras_api_internal_error(error):
-    """Handle 500 Internal Server errors for cameras API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Internal server error in camera operation',
-            'code': 'CAMERA_INTERNAL_ERROR'
-        }
-    }), 500
@@ -4,11 +4,15 @@ AOF Video Stream - Streams API Controller
 This module handles streaming-related REST API endpoints.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from typing import Dict, Any
 import logging
+import uuid
 
-from ...models.stream_model import stream_model
+from . import (RequestSchema, ResponseCache, cached_response, request_state, _choice, _error_body,
+               _invalid_request, _json_body, _non_negative_int, _positive_int, _resolution, _state_version,
+               _text)
+from ...models.stream_model import stream_model, StreamQuality, StreamSettings
 from ...models.camera_model import camera_model
 
 logger = logging.getLogger(__name__)
@@ -16,8 +20,28 @@ logger = logging.getLogger(__name__)
 # Create blueprint for streams API routes
 streams_bp = Blueprint('streams_api', __name__)
 
+# Read-only responses polled by dashboards; session and camera changes bump
+# the models' state versions, so cached bodies only live out their TTL while
+# nothing changes
+_streams_cache = ResponseCache(ttl=1.0)
+_stream_status_cache = ResponseCache(ttl=1.0)
+_stream_metrics_cache = ResponseCache(ttl=1.0)
+
+# POST /create body
+_CREATE_SESSION_SCHEMA = RequestSchema(
+    camera_index=(_non_negative_int, 0),
+    quality=(_choice(*(quality.value for quality in StreamQuality)), 'medium'),
+    resolution=(_resolution, (640, 480)),
+    fps=(_positive_int, 30),
+    description=(_text, 'API Created Session')
+)
+
+# Constant error responses, serialized once at import
+_SESSION_CREATE_FAILED_BODY = _error_body('Failed to create stream session', 'SESSION_CREATE_FAILED')
+
 
 @streams_bp.route('/')
+@cached_response(_streams_cache, _state_version, max_age=1)
 def get_streams():
     """
     Get all streaming sessions.
@@ -26,24 +50,25 @@ def get_streams():
         JSON response with streaming sessions
     """
     try:
-        sessions = stream_model.get_all_sessions()
-        stream_status = stream_model.get_stream_status()
+        # The stream status already carries every session's dictionary
+        stream_status = request_state().stream_status
+        sessions = stream_status['session_list']
         
         return jsonify({
             'success': True,
             'data': {
-                'sessions': [session.to_dict() for session in sessions],
+                'sessions': sessions,
                 'active_session': stream_status.get('active_session'),
                 'is_streaming': stream_status.get('is_streaming', False)
             },
             'meta': {
                 'total_sessions': len(sessions),
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting streams: {e}")
+        logger.error("API Error getting streams: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -54,6 +79,7 @@ def get_streams():
 
 
 @streams_bp.route('/status')
+@cached_response(_stream_status_cache, _state_version, max_age=1)
 def get_stream_status_api():
     """
     Get streaming status via API.
@@ -62,7 +88,7 @@ def get_stream_status_api():
         JSON response with streaming status
     """
     try:
-        status = stream_model.get_stream_status()
+        status = request_state().stream_status
         
         return jsonify({
             'success': True,
@@ -70,12 +96,12 @@ def get_stream_status_api():
                 'status': status
             },
             'meta': {
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting stream status: {e}")
+        logger.error("API Error getting stream status: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -115,12 +141,12 @@ def get_stream_session(session_id: str):
             },
             'meta': {
                 'session_id': session_id,
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting stream session {session_id}: {e}")
+        logger.error("API Error getting stream session %s: %s", session_id, e)
         return jsonify({
             'success': False,
             'error': {
@@ -139,21 +165,22 @@ def create_stream_session():
         JSON response with new session information
     """
     try:
-        data = request.get_json() or {}
+        try:
+            params = _CREATE_SESSION_SCHEMA.parse(_json_body())
+        except ValueError as e:
+            return _invalid_request(str(e))
         
-        # Extract session configuration
-        session_config = {
-            'quality': data.get('quality', 'medium'),
-            'resolution': data.get('resolution', [640, 480]),
-            'fps': data.get('fps', 30),
-            'duration': data.get('duration'),  # Optional duration limit
-            'description': data.get('description', 'API Created Session')
-        }
+        settings = StreamSettings(
+            quality=StreamQuality(params['quality']),
+            fps=params['fps'],
+            resolution=params['resolution']
+        )
         
         # Create session using stream model
-        session = stream_model.create_session(**session_config)
+        session = stream_model.create_session(str(uuid.uuid4()), params['camera_index'], settings)
         
         if session:
+            logger.info("Created stream session %s (%s)", session.session_id, params['description'])
             return jsonify({
                 'success': True,
                 'data': {
@@ -162,20 +189,14 @@ def create_stream_session():
                 },
                 'meta': {
                     'action': 'session_created',
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'message': 'Failed to create stream session',
-                    'code': 'SESSION_CREATE_FAILED'
-                }
-            }), 500
+            return Response(_SESSION_CREATE_FAILED_BODY, status=500, mimetype='application/json')
         
     except Exception as e:
-        logger.error(f"API Error creating stream session: {e}")
+        logger.error("API Error creating stream session: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -210,7 +231,7 @@ def start_stream_session(session_id: str):
                 'meta': {
                     'action': 'session_started',
                     'session_id': session_id,
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
@@ -223,7 +244,7 @@ def start_stream_session(session_id: str):
             }), 500
         
     except Exception as e:
-        logger.error(f"API Error starting stream session {session_id}: {e}")
+        logger.error("API Error starting stream session %s: %s", session_id, e)
         return jsonify({
             'success': False,
             'error': {
@@ -256,7 +277,7 @@ def stop_stream_session(session_id: str):
                 'meta': {
                     'action': 'session_stopped',
                     'session_id': session_id,
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
@@ -269,7 +290,7 @@ def stop_stream_session(session_id: str):
             }), 500
         
     except Exception as e:
-        logger.error(f"API Error stopping stream session {session_id}: {e}")
+        logger.error("API Error stopping stream session %s: %s", session_id, e)
         return jsonify({
             'success': False,
             'error': {
@@ -302,7 +323,7 @@ def delete_stream_session(session_id: str):
                 'meta': {
                     'action': 'session_deleted',
                     'session_id': session_id,
-                    'timestamp': camera_model.get_status().get('last_frame_time')
+                    'timestamp': request_state().timestamp
                 }
             })
         else:
@@ -315,7 +336,7 @@ def delete_stream_session(session_id: str):
             }), 404
         
     except Exception as e:
-        logger.error(f"API Error deleting stream session {session_id}: {e}")
+        logger.error("API Error deleting stream session %s: %s", session_id, e)
         return jsonify({
             'success': False,
             'error': {
@@ -326,6 +347,7 @@ def delete_stream_session(session_id: str):
 
 
 @streams_bp.route('/metrics')
+@cached_response(_stream_metrics_cache, _state_version, max_age=1)
 def get_stream_metrics():
     """
     Get streaming performance metrics.
@@ -343,12 +365,12 @@ def get_stream_metrics():
                 'metrics': metrics
             },
             'meta': {
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting stream metrics: {e}")
+        logger.error("API Error getting stream metrics: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -356,40 +378,3 @@ def get_stream_metrics():
                 'code': 'METRICS_ERROR'
             }
         }), 500
-
-
-# Error handlers specific to streams API
-@streams_bp.errorhandler(400)
-def streams_api_bad_request(error):
-    """Handle 400 Bad Request errors for streams API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Bad request for stream operation',
-            'code': 'STREAM_BAD_REQUEST'
-        }
-    }), 400
-
-
-@streams_bp.errorhandler(404)
-def streams_api_not_found(error):
-    """Handle 404 Not Found errors for streams API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Stream endpoint not found',
-            'code': 'STREAM_NOT_FOUND'
-        }
-    }), 404
-
-
-@streams_bp.errorhandler(500)
-def streams_api_internal_error(error):
-    """Handle 500 Internal Server errors for streams API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Internal server error in stream operation',
-            'code': 'STREAM_INTERNAL_ERROR'
-        }
-    }), 500
@@ -4,10 +4,15 @@ AOF Video Stream - System API Controller
 This module handles system-related REST API endpoints.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from typing import Dict, Any
 import logging
+import platform
+import sys
+import time
 
+from . import (RequestSchema, RequestState, ResponseCache, cached_response, request_state,
+               _invalid_request, _json_body, _state_version, _text)
 from ...models.camera_model import camera_model
 from ...models.stream_model import stream_model
 
@@ -16,8 +21,119 @@ logger = logging.getLogger(__name__)
 # Create blueprint for system API routes
 system_bp = Blueprint('system_api', __name__)
 
+# Read-only responses polled by dashboards. Status and health follow the
+# camera and stream state versions; config and info are static per process
+_system_status_cache = ResponseCache(ttl=1.0)
+_health_cache = ResponseCache(ttl=1.0)
+_bundle_cache = ResponseCache(ttl=1.0)
+_system_config_cache = ResponseCache(ttl=30.0)
+_system_info_cache = ResponseCache(ttl=30.0)
+
+
+# Process-invariant system information, gathered once at import
+_SYSTEM_INFO = {
+    'application': {
+        'name': 'AOF Video Stream',
+        'version': '2.0.0',
+        'phase': 'Phase 2 Complete',
+        'api_version': '1.0.0'
+    },
+    'system': {
+        'platform': platform.system(),
+        'platform_version': platform.version(),
+        'architecture': platform.machine(),
+        'python_version': sys.version.split()[0],
+        'python_implementation': platform.python_implementation()
+    },
+    'capabilities': {
+        'camera_detection': True,
+        'video_capture': True,
+        'web_interface': True,
+        'rest_api': True,
+        'streaming': False,  # Phase 3 feature
+        'recording': False   # Phase 4 feature
+    }
+}
+
+
+# POST /restart body; unknown component names are reported by the view
+_RESTART_SCHEMA = RequestSchema(component=(_text, 'all'))
+
+# Seconds between keep-alive comments on an idle event stream
+_EVENTS_HEARTBEAT = 5.0
+
+
+def _system_summary(state: RequestState) -> Dict[str, Any]:
+    """
+    Summarize the camera and streaming systems.
+    
+    Args:
+        state (RequestState): Model state of the current request
+        
+    Returns:
+        Dict[str, Any]: System summary
+    """
+    devices = state.devices
+    is_streaming = state.stream_status['is_streaming']
+    
+    return {
+        'camera_system': 'online' if devices else 'offline',
+        'streaming_system': 'active' if is_streaming else 'idle',
+        'available_devices': len(devices),
+        'active_streams': 1 if is_streaming else 0,
+        'uptime': state.camera_status.get('last_frame_time'),
+        'memory_usage': 'N/A',  # Could be implemented with psutil
+        'cpu_usage': 'N/A'      # Could be implemented with psutil
+    }
+
+
+def _health_status(state: RequestState) -> Dict[str, Any]:
+    """
+    Run the basic health checks.
+    
+    Args:
+        state (RequestState): Model state of the current request
+        
+    Returns:
+        Dict[str, Any]: Overall status and the individual checks
+    """
+    devices = state.devices
+    camera_status = state.camera_status
+    
+    health_status = {
+        'status': 'healthy',
+        'checks': {
+            'camera_detection': {
+                'status': 'pass' if devices else 'warn',
+                'details': f'{len(devices)} devices available'
+            },
+            'camera_system': {
+                'status': 'pass' if not camera_status.get('error_message') else 'fail',
+                'details': camera_status.get('error_message', 'OK')
+            },
+            'streaming_system': {
+                'status': 'pass',
+                'details': f"Streaming: {'active' if state.stream_status['is_streaming'] else 'idle'}"
+            },
+            'api_response': {
+                'status': 'pass',
+                'details': 'API responding normally'
+            }
+        }
+    }
+    
+    # Determine overall health
+    check_statuses = [check['status'] for check in health_status['checks'].values()]
+    if 'fail' in check_statuses:
+        health_status['status'] = 'unhealthy'
+    elif 'warn' in check_statuses:
+        health_status['status'] = 'degraded'
+    
+    return health_status
+
 
 @system_bp.route('/status')
+@cached_response(_system_status_cache, _state_version, max_age=1)
 def get_system_status():
     """
     Get system status via API.
@@ -26,46 +142,129 @@ def get_system_status():
         JSON response with system status
     """
     try:
-        camera_status = camera_model.get_status()
-        stream_status = stream_model.get_stream_status()
-        devices = camera_model.get_devices()
+        state = request_state()
         
-        system_status = {
-            'camera_system': 'online' if devices else 'offline',
-            'streaming_system': 'active' if stream_status['is_streaming'] else 'idle',
-            'available_devices': len(devices),
-            'active_streams': 1 if stream_status['is_streaming'] else 0,
-            'uptime': camera_status.get('last_frame_time'),
-            'memory_usage': 'N/A',  # Could be implemented with psutil
-            'cpu_usage': 'N/A'      # Could be implemented with psutil
-        }
+        return jsonify({
+            'success': True,
+            'data': {
+                'system': _system_summary(state),
+                'camera': state.camera_status,
+                'stream': state.stream_status,
+                'devices': state.devices
+            },
+            'meta': {
+                'timestamp': state.timestamp,
+                'api_version': '1.0.0'
+            }
+        })
+        
+    except Exception as e:
+        logger.error("API Error getting system status: %s", e)
+        return jsonify({
+            'success': False,
+            'error': {
+                'message': str(e),
+                'code': 'SYSTEM_STATUS_ERROR'
+            }
+        }), 500
+
+
+@system_bp.route('/bundle')
+@cached_response(_bundle_cache, _state_version, max_age=1)
+def get_dashboard_bundle():
+    """
+    Get the data dashboards poll, in one response.
+    
+    Combines system status, health and streaming sessions so a dashboard
+    refresh is one round-trip, with each model read once.
+    
+    Returns:
+        JSON response with system, health and stream data
+    """
+    try:
+        state = request_state()
+        stream_status = state.stream_status
         
         return jsonify({
             'success': True,
             'data': {
-                'system': system_status,
-                'camera': camera_status,
+                'system': _system_summary(state),
+                'health': _health_status(state),
+                'camera': state.camera_status,
                 'stream': stream_status,
-                'devices': devices
+                'devices': state.devices
             },
             'meta': {
-                'timestamp': camera_status.get('last_frame_time'),
+                'total_sessions': stream_status['total_sessions'],
+                'timestamp': state.timestamp,
                 'api_version': '1.0.0'
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting system status: {e}")
+        logger.error("API Error getting dashboard bundle: %s", e)
         return jsonify({
             'success': False,
             'error': {
                 'message': str(e),
-                'code': 'SYSTEM_STATUS_ERROR'
+                'code': 'BUNDLE_ERROR'
             }
         }), 500
 
 
+def _generate_events():
+    """
+    Yield server-sent events with the dashboard data whenever it changes.
+    
+    Session changes wake the stream immediately; camera state changes are
+    picked up within a second. Idle streams get a keep-alive comment every
+    few seconds so proxies don't close them.
+    """
+    last_version = None
+    last_sent = 0.0
+    try:
+        while True:
+            version = _state_version()
+            if version != last_version:
+                state = RequestState()
+                payload = {
+                    'system': _system_summary(state),
+                    'health': _health_status(state),
+                    'stream': state.stream_status,
+                    'timestamp': state.timestamp
+                }
+                yield b''.join((b'data: ', current_app.json.dumps(payload).encode('utf-8'), b'\n\n'))
+                last_version = version
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= _EVENTS_HEARTBEAT:
+                yield b': keep-alive\n\n'
+                last_sent = time.monotonic()
+            
+            stream_model.wait_for_change(version[1], timeout=1.0)
+            
+    except Exception as e:
+        logger.error("API Error in system event stream: %s", e)
+
+
+@system_bp.route('/events')
+def get_system_events():
+    """
+    Stream system, health and streaming status as server-sent events.
+    
+    Pushes the same data as /bundle each time it changes, so dashboards
+    don't need to poll.
+    
+    Returns:
+        text/event-stream response
+    """
+    response = Response(stream_with_context(_generate_events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop nginx buffering events
+    return response
+
+
 @system_bp.route('/config')
+@cached_response(_system_config_cache, max_age=60)
 def get_system_config():
     """
     Get system configuration via API.
@@ -100,13 +299,13 @@ def get_system_config():
                 'config': config_info
             },
             'meta': {
-                'timestamp': camera_model.get_status().get('last_frame_time'),
+                'timestamp': request_state().timestamp,
                 'api_version': '1.0.0'
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting system config: {e}")
+        logger.error("API Error getting system config: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -117,6 +316,7 @@ def get_system_config():
 
 
 @system_bp.route('/health')
+@cached_response(_health_cache, _state_version, max_age=1)
 def health_check():
     """
     System health check endpoint.
@@ -125,51 +325,19 @@ def health_check():
         JSON response with health status
     """
     try:
-        # Basic health checks
-        devices = camera_model.get_devices()
-        camera_status = camera_model.get_status()
-        stream_status = stream_model.get_stream_status()
-        
-        health_status = {
-            'status': 'healthy',
-            'checks': {
-                'camera_detection': {
-                    'status': 'pass' if devices else 'warn',
-                    'details': f'{len(devices)} devices available'
-                },
-                'camera_system': {
-                    'status': 'pass' if not camera_status.get('error_message') else 'fail',
-                    'details': camera_status.get('error_message', 'OK')
-                },
-                'streaming_system': {
-                    'status': 'pass',
-                    'details': f"Streaming: {'active' if stream_status['is_streaming'] else 'idle'}"
-                },
-                'api_response': {
-                    'status': 'pass',
-                    'details': 'API responding normally'
-                }
-            }
-        }
-        
-        # Determine overall health
-        check_statuses = [check['status'] for check in health_status['checks'].values()]
-        if 'fail' in check_statuses:
-            health_status['status'] = 'unhealthy'
-        elif 'warn' in check_statuses:
-            health_status['status'] = 'degraded'
+        state = request_state()
         
         return jsonify({
             'success': True,
-            'data': health_status,
+            'data': _health_status(state),
             'meta': {
-                'timestamp': camera_status.get('last_frame_time'),
+                'timestamp': state.timestamp,
                 'api_version': '1.0.0'
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error in health check: {e}")
+        logger.error("API Error in health check: %s", e)
         return jsonify({
             'success': False,
             'data': {
@@ -189,6 +357,7 @@ def health_check():
 
 
 @system_bp.route('/info')
+@cached_response(_system_info_cache, max_age=60)
 def get_system_info():
     """
     Get general system information.
@@ -197,44 +366,17 @@ def get_system_info():
         JSON response with system information
     """
     try:
-        import platform
-        import sys
-        
-        system_info = {
-            'application': {
-                'name': 'AOF Video Stream',
-                'version': '2.0.0',
-                'phase': 'Phase 2 Complete',
-                'api_version': '1.0.0'
-            },
-            'system': {
-                'platform': platform.system(),
-                'platform_version': platform.version(),
-                'architecture': platform.machine(),
-                'python_version': sys.version.split()[0],
-                'python_implementation': platform.python_implementation()
-            },
-            'capabilities': {
-                'camera_detection': True,
-                'video_capture': True,
-                'web_interface': True,
-                'rest_api': True,
-                'streaming': False,  # Phase 3 feature
-                'recording': False   # Phase 4 feature
-            }
-        }
-        
         return jsonify({
             'success': True,
-            'data': system_info,
+            'data': _SYSTEM_INFO,
             'meta': {
-                'timestamp': camera_model.get_status().get('last_frame_time'),
+                'timestamp': request_state().timestamp,
                 'api_version': '1.0.0'
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting system info: {e}")
+        logger.error("API Error getting system info: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -261,7 +403,7 @@ def get_system_logs():
         # In a real system, you would read from actual log files
         logs = [
             {
-                'timestamp': camera_model.get_status().get('last_frame_time'),
+                'timestamp': request_state().timestamp,
                 'level': 'INFO',
                 'module': 'system_api',
                 'message': 'System logs endpoint accessed'
@@ -277,13 +419,13 @@ def get_system_logs():
                 'limit': limit
             },
             'meta': {
-                'timestamp': camera_model.get_status().get('last_frame_time'),
+                'timestamp': request_state().timestamp,
                 'api_version': '1.0.0'
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error getting system logs: {e}")
+        logger.error("API Error getting system logs: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -302,8 +444,10 @@ def restart_system():
         JSON response confirming restart
     """
     try:
-        data = request.get_json() or {}
-        component = data.get('component', 'all')
+        try:
+            component = _RESTART_SCHEMA.parse(_json_body())['component']
+        except ValueError as e:
+            return _invalid_request(str(e))
         
         success = False
         message = ''
@@ -338,12 +482,12 @@ def restart_system():
             },
             'meta': {
                 'action': 'system_restart',
-                'timestamp': camera_model.get_status().get('last_frame_time')
+                'timestamp': request_state().timestamp
             }
         })
         
     except Exception as e:
-        logger.error(f"API Error restarting system: {e}")
+        logger.error("API Error restarting system: %s", e)
         return jsonify({
             'success': False,
             'error': {
@@ -351,40 +495,3 @@ def restart_system():
                 'code': 'RESTART_ERROR'
             }
         }), 500
-
-
-# Error handlers specific to system API
-@system_bp.errorhandler(400)
-def system_api_bad_request(error):
-    """Handle 400 Bad Request errors for system API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Bad request for system operation',
-            'code': 'SYSTEM_BAD_REQUEST'
-        }
-    }), 400
-
-
-@system_bp.errorhandler(404)
-def system_api_not_found(error):
-    """Handle 404 Not Found errors for system API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'System endpoint not found',
-            'code': 'SYSTEM_NOT_FOUND'
-        }
-    }), 404
-
-
-@system_bp.errorhandler(500)
-def system_api_internal_error(error):
-    """Handle 500 Internal Server errors for system API."""
-    return jsonify({
-        'success': False,
-        'error': {
-            'message': 'Internal server error in system operation',
-            'code': 'SYSTEM_INTERNAL_ERROR'
-        }
-    }), 500
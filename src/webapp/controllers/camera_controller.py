@@ -10,7 +10,8 @@ import logging
 import uuid
 import json
 
-from ..models.camera_model import camera_model
+from . import mjpeg_part_header
+from ..models.camera_model import camera_model, frame_bus
 from ..models.stream_model import stream_model, StreamSettings, StreamQuality
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,6 @@ logger = logging.getLogger(__name__)
 # Create blueprint for camera routes
 camera_bp = Blueprint('camera', __name__)
 
-
 @camera_bp.route('/devices')
 def get_devices():
     """
@@ -251,7 +251,7 @@ def take_snapshot():
             }), 400
         
         # Get JPEG encoded frame
-        jpeg_data = camera_model.get_frame_as_jpeg(quality=95)
+        jpeg_data = frame_bus.latest(quality=95)[1]
         
         if jpeg_data is None:
             return jsonify({
@@ -284,8 +284,8 @@ def get_frame():
         JPEG image response or error
     """
     try:
-        # Get JPEG frame
-        jpeg_data = camera_model.get_frame_as_jpeg()
+        # Latest captured frame, encoded at most once for all viewers
+        jpeg_data = frame_bus.latest()[1]
         
         if jpeg_data is None:
             return jsonify({
@@ -322,22 +322,27 @@ def stream_video():
     """
     def generate_frames():
         """Generator function for streaming frames."""
+        sequence = -1
         try:
             while True:
-                # Get JPEG frame
-                jpeg_data = camera_model.get_frame_as_jpeg()
+                # Waits for the capture thread's next frame, encoded once for
+                # every viewer
+                sequence, jpeg = frame_bus.wait_next(sequence)
                 
-                if jpeg_data is None:
-                    break
+                if jpeg is None:
+                    if not camera_model.is_streaming():
+                        break
+                    continue
                 
                 # Update stream metrics
                 active_session = stream_model.get_active_session()
                 if active_session:
-                    stream_model.update_frame_metrics(active_session.session_id, len(jpeg_data))
+                    stream_model.update_frame_metrics(active_session.session_id, len(jpeg))
                 
-                # Yield frame in multipart format
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data + b'\r\n')
+                # The encoder output is sent as its own chunk, uncopied
+                yield mjpeg_part_header(len(jpeg))
+                yield jpeg
+                yield b'\r\n'
                 
         except Exception as e:
             logger.error(f"Error in frame generator: {e}")
@@ -346,6 +351,7 @@ def stream_video():
         return Response(
             generate_frames(),
             mimetype='multipart/x-mixed-replace; boundary=frame',
+            direct_passthrough=True,
             headers={
                 'Cache-Control': 'no-cache, no-store, must-revalidate',
                 'Pragma': 'no-cache',
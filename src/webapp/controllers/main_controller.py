@@ -170,15 +170,3 @@ def config():
     except Exception as e:
         logger.error(f"Error getting configuration: {e}")
         return jsonify({'error': str(e)}), 500
-
-
-@main_bp.errorhandler(404)
-def not_found(error):
-    """Handle 404 errors for main blueprint."""
-    return render_template('errors/404.html'), 404
-
-
-@main_bp.errorhandler(500)
-def internal_error(error):
-    """Handle 500 errors for main blueprint."""
-    return render_template('errors/500.html'), 500
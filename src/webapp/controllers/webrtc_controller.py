@@ -18,7 +18,7 @@ import hashlib
 
 from flask import request
 from flask_socketio import SocketIO, emit, disconnect
-from ..models.camera_model import camera_model
+from ..models.camera_model import camera_model, frame_bus
 
 logger = logging.getLogger(__name__)
 
@@ -373,9 +373,12 @@ class WebRTCVideoStreamer:
                     time.sleep(0.0001)  # Very short sleep for high FPS
                     continue
                 
-                # Get frame from camera
+                # Next captured frame, shared with every other viewer
                 quality = conn_data['quality']
-                frame_data = camera_model.get_frame_as_jpeg(quality=quality)
+                sequence, frame_data = frame_bus.wait_next(
+                    conn_data.get('frame_sequence', -1), quality, timeout=0.1
+                )
+                conn_data['frame_sequence'] = sequence
                 
                 if frame_data:
                     frame_size = len(frame_data)
@@ -17,7 +17,7 @@ from datetime import datetime
 
 from flask import request
 from flask_socketio import SocketIO, emit, disconnect
-from ..models.camera_model import camera_model
+from ..models.camera_model import camera_model, frame_bus
 
 logger = logging.getLogger(__name__)
 
@@ -547,8 +547,12 @@ class WebSocketVideoStreamer:
                     effective_quality = self._adjust_quality_for_bitrate(client_id, current_bitrate_kbps, target_kbps)
 
                 self.active_connections[client_id]['quality'] = effective_quality
-                # Get frame from camera with calculated quality
-                frame_data = camera_model.get_frame_as_jpeg(quality=effective_quality)
+                # Next captured frame at the calculated quality, shared with
+                # every other viewer using it
+                sequence, frame_data = frame_bus.wait_next(
+                    conn_data.get('frame_sequence', -1), effective_quality, timeout=0.1
+                )
+                conn_data['frame_sequence'] = sequence
                 
                 if frame_data:
                     # Get frame size
@@ -5,7 +5,7 @@ This package contains data models and business logic for the application.
 """
 
 from flask import Flask
-from .camera_model import CameraModel
+from .camera_model import CameraModel, camera_model
 from .stream_model import StreamModel
 
 def init_models(app: Flask) -> None:
@@ -17,4 +17,7 @@ def init_models(app: Flask) -> None:
     """
     # Initialize models if needed
     # This could include database connections, cache setup, etc.
-    pass
+    camera_model.configure_capture(
+        realtime=app.config.get('CAPTURE_REALTIME', False),
+        pin_cpu=app.config.get('CAPTURE_PIN_CPU', False)
+    )
@@ -10,10 +10,11 @@ import numpy as np
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
+import threading
 
 # Import camera components
 from src.camera import CameraManager, DeviceDetector, VideoCapture
-from src.camera.hardware_encoder import get_hardware_encoder, cleanup_hardware_encoder
+from src.camera.hardware_encoder import get_hardware_encoder, cleanup_hardware_encoder, encode_jpeg
 
 logger = logging.getLogger(__name__)
 
@@ -62,12 +63,22 @@ class CameraModel:
         
         self._status = CameraStatus()
         self._current_frame: Optional[np.ndarray] = None
+        # Capture sequence of the last frame counted (restarts with each stream)
+        self._counted_sequence = -1
+        self._count_lock = threading.Lock()
+        
+        # Incremented whenever streaming or encoder state changes, so API
+        # response caches can tell their bodies are stale
+        self.state_version = 0
         
         # Hardware encoding support
         self._hardware_encoder = None
         self._use_hardware_encoding = True  # Enable by default
         self._selected_codec = 'auto'  # Default codec selection
         
+        # Capture thread scheduling passed to VideoCapture.start_capture()
+        self._capture_options: Dict[str, bool] = {'realtime': False, 'pin_cpu': False}
+        
         # Use cached devices if available
         if self._is_cache_valid():
             self._devices = self._cached_devices.copy()
@@ -108,20 +119,23 @@ class CameraModel:
             return [asdict(device) for device in self._devices]
         
         if refresh or not self._devices:
-            self._refresh_devices(quick_scan=quick_scan)
+            self._refresh_devices(quick_scan=quick_scan, force=refresh)
         
         return [asdict(device) for device in self._devices]
     
-    def _refresh_devices(self, quick_scan: bool = True) -> None:
+    def _refresh_devices(self, quick_scan: bool = True, force: bool = False) -> None:
         """
         Refresh the list of camera devices.
         
         Args:
             quick_scan: Use quick scanning for faster detection
+            force: Bypass the detector's short-lived scan cache
         """
         try:
             logger.info(f"Refreshing camera devices with {'quick' if quick_scan else 'full'} scan...")
-            detected_devices = self.device_detector.detect_cameras(max_devices=4, quick_scan=quick_scan)
+            detected_devices = self.device_detector.detect_cameras(
+                max_devices=4, quick_scan=quick_scan, force=force
+            )
             self._devices.clear()
             # Update camera manager's device detector with the same detected devices
             self.camera_manager.device_detector.available_devices = detected_devices
@@ -187,7 +201,7 @@ class CameraModel:
                 self.video_capture.set_fps(fps)
                 
                 # Start capture immediately
-                capture_success = self.video_capture.start_capture()
+                capture_success = self.video_capture.start_capture(**self._capture_options)
                 if not capture_success:
                     self._status.error_message = "Failed to start video capture"
                     return False
@@ -206,7 +220,7 @@ class CameraModel:
                 # Start video capture
                 self.video_capture = VideoCapture(camera_index, quick_init=False)
                 self.video_capture.initialize()
-                capture_success = self.video_capture.start_capture()
+                capture_success = self.video_capture.start_capture(**self._capture_options)
                 if not capture_success:
                     self._status.error_message = "Failed to start video capture"
                     self.camera_manager.release_camera()
@@ -218,6 +232,7 @@ class CameraModel:
             self._status.resolution = resolution
             self._status.fps = fps
             self._status.frame_count = 0
+            self._counted_sequence = -1
             self._status.error_message = None
             
             # Store selected codec for hardware encoding
@@ -231,6 +246,7 @@ class CameraModel:
                 except Exception as e:
                     logger.warning(f"Failed to initialize hardware encoder: {e}, falling back to software")
             
+            self.state_version += 1
             logger.info(f"Started camera stream: device {camera_index}, {resolution[0]}x{resolution[1]}@{fps}fps, codec: {self._selected_codec}")
             return True
             
@@ -257,9 +273,11 @@ class CameraModel:
             self._status.is_active = False
             self._status.current_device = None
             self._status.frame_count = 0
+            self._counted_sequence = -1
             self._status.last_frame_time = None
             self._status.error_message = None
             self._current_frame = None
+            self.state_version += 1
             
             logger.info("Camera stream stopped")
             return True
@@ -273,19 +291,19 @@ class CameraModel:
         """
         Get the latest frame from the camera.
         
+        The frame comes from the capture thread's ring buffer, so the device
+        is never read outside that thread.
+        
         Returns:
-            Latest frame as numpy array, or None if no frame available
+            Latest frame as read-only numpy array, or None if no frame available
         """
         if not self._status.is_active:
             return None
         
         try:
-            # read_frame() returns (success, frame) tuple
-            success, frame = self.video_capture.read_frame()
-            if success and frame is not None:
-                self._current_frame = frame
-                self._status.frame_count += 1
-                self._status.last_frame_time = datetime.now()
+            sequence, frame = self.video_capture.get_latest_frame()
+            if frame is not None:
+                self.record_frame(sequence, frame)
                 return frame
             else:
                 return None
@@ -295,6 +313,37 @@ class CameraModel:
             self._status.error_message = str(e)
             return None
     
+    def wait_for_frame(self, sequence: int, timeout: float = 1.0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Wait for a captured frame newer than the given sequence number.
+        
+        Args:
+            sequence: Sequence number of the last frame seen (-1 for none)
+            timeout: Seconds to wait
+            
+        Returns:
+            (sequence, frame) of the newest frame, or (sequence, None) if no
+            new frame arrived or the camera is not streaming
+        """
+        if not self._status.is_active:
+            return sequence, None
+        return self.video_capture.wait_for_frame(sequence, timeout)
+    
+    def get_latest_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Get the newest captured frame without reading the device.
+        
+        Returns:
+            (sequence, read-only frame), or (-1, None) if not streaming
+        """
+        if not self._status.is_active:
+            return -1, None
+        return self.video_capture.get_latest_frame()
+    
+    def is_streaming(self) -> bool:
+        """Check if a camera stream is active."""
+        return self._status.is_active
+    
     def get_frame_as_jpeg(self, quality: int = 85, use_hardware: bool = True, codec: str = None) -> Optional[bytes]:
         """
         Get the latest frame encoded using the specified codec with hardware acceleration when available.
@@ -311,6 +360,21 @@ class CameraModel:
         if frame is None:
             return None
         
+        return self.encode_frame(frame, quality, use_hardware, codec)
+    
+    def encode_frame(self, frame: np.ndarray, quality: int = 85, use_hardware: bool = True, codec: str = None) -> Optional[bytes]:
+        """
+        Encode a captured frame with the selected codec and encoder.
+        
+        Args:
+            frame: Frame to encode
+            quality: Encoding quality (1-100)
+            use_hardware: Whether to use hardware encoding if available
+            codec: Codec to use (None for the selected codec)
+            
+        Returns:
+            Encoded frame as bytes, or None on failure
+        """
         # Use selected codec if none specified
         if codec is None:
             codec = getattr(self, '_selected_codec', 'auto')
@@ -330,10 +394,6 @@ class CameraModel:
                 return self._encode_frame_hardware(frame, quality, codec)
             else:
                 return self._encode_frame_software(frame, quality)
-            if use_hardware and self._use_hardware_encoding:
-                return self._encode_frame_hardware(frame, quality)
-            else:
-                return self._encode_frame_software(frame, quality)
                 
         except Exception as e:
             logger.error(f"Error encoding frame as JPEG: {e}")
@@ -341,21 +401,43 @@ class CameraModel:
             # Fallback to software encoding
             return self._encode_frame_software(frame, quality)
     
+    def record_frame(self, sequence: int, frame: np.ndarray):
+        """
+        Count a delivered frame, once per captured frame however many viewers get it.
+        
+        Args:
+            sequence: Sequence number of the frame in the capture ring
+            frame: The delivered frame
+        """
+        with self._count_lock:
+            if sequence == self._counted_sequence:
+                return
+            self._counted_sequence = sequence
+            self._current_frame = frame
+            self._status.frame_count += 1
+            self._status.last_frame_time = datetime.now()
+    
+    def _ensure_hardware_encoder(self, frame: np.ndarray, codec: str):
+        """Create the hardware encoder, or recreate it when the codec changed."""
+        # Initialize hardware encoder if needed
+        if self._hardware_encoder is None:
+            height, width = frame.shape[:2]
+            fps = self._status.fps or 30
+            self._hardware_encoder = get_hardware_encoder(width, height, fps, codec)
+            self.state_version += 1
+        
+        # Reinitialize if codec changed
+        elif hasattr(self._hardware_encoder, 'requested_codec') and self._hardware_encoder.requested_codec != codec:
+            height, width = frame.shape[:2]
+            fps = self._status.fps or 30
+            self._hardware_encoder.cleanup()
+            self._hardware_encoder = get_hardware_encoder(width, height, fps, codec)
+            self.state_version += 1
+    
     def _encode_frame_hardware(self, frame: np.ndarray, quality: int, codec: str = 'auto') -> Optional[bytes]:
         """Encode frame using hardware acceleration."""
         try:
-            # Initialize hardware encoder if needed
-            if self._hardware_encoder is None:
-                height, width = frame.shape[:2]
-                fps = self._status.fps or 30
-                self._hardware_encoder = get_hardware_encoder(width, height, fps, codec)
-            
-            # Reinitialize if codec changed
-            elif hasattr(self._hardware_encoder, 'requested_codec') and self._hardware_encoder.requested_codec != codec:
-                height, width = frame.shape[:2]
-                fps = self._status.fps or 30
-                self._hardware_encoder.cleanup()
-                self._hardware_encoder = get_hardware_encoder(width, height, fps, codec)
+            self._ensure_hardware_encoder(frame, codec)
             
             # Use hardware encoder
             encoded_data = self._hardware_encoder.encode_frame(frame, quality)
@@ -373,12 +455,11 @@ class CameraModel:
     def _encode_frame_software(self, frame: np.ndarray, quality: int) -> Optional[bytes]:
         """Encode frame using software (CPU) encoding."""
         try:
-            # Standard JPEG encoding
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
-            success, encoded_frame = cv2.imencode('.jpg', frame, encode_params)
+            # Standard JPEG encoding (libjpeg-turbo when available, cached imencode params otherwise)
+            encoded_frame = encode_jpeg(frame, quality)
             
-            if success:
-                return encoded_frame.tobytes()
+            if encoded_frame is not None:
+                return encoded_frame
             else:
                 logger.error("Failed to encode frame as JPEG")
                 return None
@@ -405,6 +486,15 @@ class CameraModel:
         
         return status_dict
     
+    def get_last_frame_time(self) -> Optional[datetime]:
+        """
+        Get the time of the last captured frame without building the full status.
+        
+        Returns:
+            Time of the last frame, or None if no frame has been captured
+        """
+        return self._status.last_frame_time
+    
     def update_settings(self, resolution: Optional[Tuple[int, int]] = None, fps: Optional[int] = None) -> bool:
         """
         Update camera settings while streaming.
@@ -443,10 +533,20 @@ class CameraModel:
         Returns:
             Snapshot frame as numpy array, or None if no frame available
         """
-        if self._current_frame is not None:
-            return self._current_frame.copy()
-        else:
-            return self.get_frame()
+        frame = self._current_frame
+        if frame is None:
+            frame = self.get_frame()
+        return None if frame is None else frame.copy()
+    
+    def configure_capture(self, realtime: bool = False, pin_cpu: bool = False):
+        """
+        Set the capture thread scheduling used by streams started from now on.
+        
+        Args:
+            realtime: Run capture threads under SCHED_FIFO
+            pin_cpu: Pin each capture thread to a core of its own
+        """
+        self._capture_options = {'realtime': realtime, 'pin_cpu': pin_cpu}
     
     def set_hardware_encoding(self, enabled: bool) -> bool:
         """
@@ -465,6 +565,7 @@ class CameraModel:
                 # Clean up hardware encoder if disabling
                 self._hardware_encoder.cleanup()
                 self._hardware_encoder = None
+            self.state_version += 1
             
             logger.info(f"Hardware encoding {'enabled' if enabled else 'disabled'}")
             return True
@@ -522,6 +623,7 @@ class CameraModel:
                 f = fps or self._status.fps or 30
                 
                 self._hardware_encoder = get_hardware_encoder(w, h, f, codec)
+                self.state_version += 1
                 logger.info(f"Hardware encoder reinitialized: {w}x{h}@{f}fps with codec {codec}")
             
         except Exception as e:
@@ -592,6 +694,80 @@ class CameraModel:
             logger.error(f"Error during camera cleanup: {e}")
 
 
+class FrameBus:
+    """
+    Shares each captured frame's JPEG between all HTTP viewers.
+    
+    The first viewer to ask for a new frame encodes it and every other viewer
+    of that frame gets the same bytes, so encoding cost follows the capture
+    rate rather than the number of viewers. Frames are encoded on demand, so
+    nothing is encoded while nobody is watching.
+    """
+    
+    def __init__(self, model: CameraModel):
+        """
+        Initialize the bus.
+        
+        Args:
+            model: Camera model providing the captured frames
+        """
+        self._model = model
+        self._lock = threading.Lock()
+        # quality -> (model state version, frame sequence, JPEG data)
+        self._latest: Dict[int, Tuple[int, int, bytes]] = {}
+    
+    def latest(self, quality: int = 85) -> Tuple[int, Optional[bytes]]:
+        """
+        Get the newest frame as JPEG.
+        
+        Args:
+            quality: JPEG quality (1-100)
+            
+        Returns:
+            (sequence, JPEG data), or (-1, None) if no frame is available
+        """
+        sequence, frame = self._model.get_latest_frame()
+        if frame is None:
+            return sequence, None
+        return sequence, self._encode(sequence, frame, quality)
+    
+    def wait_next(self, sequence: int, quality: int = 85, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """
+        Wait for a frame newer than the given sequence number and get it as JPEG.
+        
+        Args:
+            sequence: Sequence number of the last frame seen (-1 for none)
+            quality: JPEG quality (1-100)
+            timeout: Seconds to wait
+            
+        Returns:
+            (sequence, JPEG data), or (sequence, None) if no new frame arrived
+        """
+        sequence, frame = self._model.wait_for_frame(sequence, timeout)
+        if frame is None:
+            return sequence, None
+        return sequence, self._encode(sequence, frame, quality)
+    
+    def _encode(self, sequence: int, frame: np.ndarray, quality: int) -> Optional[bytes]:
+        """Encode a frame unless another viewer already has."""
+        # Sequences restart with each stream, so entries are also tied to the
+        # model's state version
+        version = self._model.state_version
+        with self._lock:
+            cached = self._latest.get(quality)
+            if cached is not None and cached[0] == version and cached[1] == sequence:
+                return cached[2]
+            
+            self._model.record_frame(sequence, frame)
+            
+            # Goes through the model so the selected codec and hardware
+            # encoder settings apply
+            jpeg = self._model.encode_frame(frame, quality)
+            if jpeg is not None:
+                self._latest[quality] = (version, sequence, jpeg)
+            return jpeg
+
+
 # Global camera model instance with pre-initialized cache
 camera_model = None
 
@@ -613,7 +789,10 @@ def get_camera_model() -> CameraModel:
     return camera_model
 
 # Export the getter function
-__all__ = ['CameraModel', 'CameraDevice', 'CameraStatus', 'get_camera_model']
+__all__ = ['CameraModel', 'CameraDevice', 'CameraStatus', 'FrameBus', 'get_camera_model', 'frame_bus']
 
 # For backward compatibility, create the instance
 camera_model = get_camera_model()
+
+# Every HTTP frame and stream viewer shares one encode per captured frame
+frame_bus = FrameBus(camera_model)
@@ -209,6 +209,12 @@ class StreamModel:
         self._default_settings = StreamSettings()
         self._lock = threading.Lock()
         
+        # Incremented whenever sessions are added, removed, started or
+        # stopped, so API response caches can tell their bodies are stale;
+        # event streams wait on the condition for the next change
+        self.state_version = 0
+        self._state_changed = threading.Condition()
+        
         # Stream event callbacks
         self._event_callbacks: Dict[str, List[Callable]] = {
             'session_started': [],
@@ -237,6 +243,7 @@ class StreamModel:
         with self._lock:
             session = StreamSession(session_id, camera_index, settings)
             self._sessions[session_id] = session
+            self._bump_state_version()
             
             logger.info(f"Created stream session: {session_id}")
             return session
@@ -264,6 +271,7 @@ class StreamModel:
             try:
                 session.start()
                 self._active_session = session
+                self._bump_state_version()
                 
                 # Trigger event callbacks
                 self._trigger_event('session_started', session)
@@ -296,6 +304,7 @@ class StreamModel:
                 
                 if self._active_session and self._active_session.session_id == session_id:
                     self._active_session = None
+                self._bump_state_version()
                 
                 # Trigger event callbacks
                 self._trigger_event('session_stopped', session)
@@ -307,6 +316,27 @@ class StreamModel:
                 logger.error(f"Failed to stop session {session_id}: {e}")
                 return False
     
+    def _bump_state_version(self) -> None:
+        """Record a session change and wake threads waiting for one."""
+        with self._state_changed:
+            self.state_version += 1
+            self._state_changed.notify_all()
+    
+    def wait_for_change(self, version: int, timeout: float = 1.0) -> int:
+        """
+        Wait for the session state to change from a known version.
+        
+        Args:
+            version: State version the caller last saw
+            timeout: Seconds to wait
+            
+        Returns:
+            Current state version (unchanged if the wait timed out)
+        """
+        with self._state_changed:
+            self._state_changed.wait_for(lambda: self.state_version != version, timeout)
+            return self.state_version
+    
     def get_session(self, session_id: str) -> Optional[StreamSession]:
         """
         Get a streaming session by ID.
@@ -361,6 +391,7 @@ class StreamModel:
             
             if self._active_session and self._active_session.session_id == session_id:
                 self._active_session = None
+            self._bump_state_version()
             
             logger.info(f"Removed stream session: {session_id}")
             return True
@@ -378,6 +409,15 @@ class StreamModel:
             session.update_metrics(frame_size_bytes)
             self._trigger_event('frame_received', session)
     
+    def get_all_sessions_as_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Get all streaming sessions as dictionaries.
+        
+        Returns:
+            List of session dictionaries, in creation order
+        """
+        return [session.to_dict() for session in list(self._sessions.values())]
+    
     def get_stream_status(self) -> Dict[str, Any]:
         """
         Get overall streaming status.
@@ -386,12 +426,21 @@ class StreamModel:
             Dictionary containing streaming status information
         """
         active_session = self.get_active_session()
+        session_list = self.get_all_sessions_as_dicts()
+        
+        # The active session is normally in the list, so reuse its dictionary
+        active_dict = None
+        if active_session is not None:
+            active_dict = next((entry for entry in session_list
+                                if entry['session_id'] == active_session.session_id), None)
+            if active_dict is None:
+                active_dict = active_session.to_dict()
         
         return {
             'is_streaming': active_session is not None and active_session.is_active(),
-            'active_session': active_session.to_dict() if active_session else None,
-            'total_sessions': len(self._sessions),
-            'session_list': [session.to_dict() for session in self._sessions.values()]
+            'active_session': active_dict,
+            'total_sessions': len(session_list),
+            'session_list': session_list
         }
     
     def register_event_callback(self, event_name: str, callback: Callable) -> None:
@@ -0,0 +1,181 @@
+"""
+Tests for the REST API helpers and endpoints.
+
+Runs against the Flask test client with TestingConfig, so no camera needs to
+be connected.
+"""
+
+import sys
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from flask import Response
+
+# Add project root to path (go up one level from tests)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.camera.frame_buffer import FrameRingBuffer
+from src.webapp.app import create_app
+from src.webapp.config import TestingConfig
+from src.webapp.controllers.api import ResponseCache, SingleFlight
+
+
+@pytest.fixture(scope='module')
+def client():
+    """Flask test client for a testing app instance."""
+    app, _ = create_app(TestingConfig)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    {'fps': 'fast'},
+    {'fps': 0},
+    {'camera_index': -1},
+    {'quality': 'extreme'},
+    {'resolution': [640]},
+    {'resolution': [640, 'tall']},
+    [1, 2, 3],
+])
+def test_create_stream_rejects_malformed_body(client, body):
+    """Invalid stream creation fields are rejected before any session is made."""
+    response = client.post('/api/streams/create', json=body)
+    
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_PARAMETER'
+
+
+@pytest.mark.parametrize('body', [{'component': 5}, {'component': ['camera']}, 'camera'])
+def test_restart_rejects_malformed_body(client, body):
+    """A restart component that isn't a string is rejected."""
+    response = client.post('/api/system/restart', json=body)
+    
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_PARAMETER'
+
+
+def test_cached_view_returns_304_for_matching_etag(client):
+    """A cached view answers If-None-Match with 304 Not Modified."""
+    first = client.get('/api/system/config')
+    etag = first.headers.get('ETag')
+    
+    assert first.status_code == 200
+    assert etag
+    
+    second = client.get('/api/system/config', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    
+    stale = client.get('/api/system/config', headers={'If-None-Match': '"stale"'})
+    assert stale.status_code == 200
+
+
+def test_events_stream_sends_dashboard_data(client):
+    """The SSE stream starts with the current dashboard data."""
+    response = client.get('/api/system/events')
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        
+        event = next(iter(response.response))
+        assert event.startswith(b'data: ')
+        assert event.endswith(b'\n\n')
+        assert b'"health"' in event and b'"stream"' in event
+    finally:
+        response.close()
+
+
+def test_ring_buffer_latest_after_wraparound():
+    """latest() returns the newest frame once the slots have wrapped."""
+    ring = FrameRingBuffer(slots=4)
+    assert ring.latest() == (-1, None)
+    
+    for value in range(10):
+        ring.publish(np.full((2, 2), value, dtype=np.uint8))
+    
+    sequence, frame = ring.latest()
+    assert sequence == 9
+    assert (frame == 9).all()
+    assert not frame.flags.writeable
+    
+    ring.clear()
+    assert ring.latest() == (-1, None)
+
+
+def test_ring_buffer_rejects_invalid_slot_count():
+    """Slot counts must be powers of two."""
+    with pytest.raises(ValueError):
+        FrameRingBuffer(slots=6)
+
+
+def test_response_cache_hits_only_matching_key():
+    """Stored bodies are served with an ETag for the same key only."""
+    cache = ResponseCache(ttl=60)
+    stored = cache.put(Response(b'{"a": 1}', mimetype='application/json'), key='v1')
+    
+    cached = cache.get('v1')
+    assert cached.get_data() == b'{"a": 1}'
+    assert cached.get_etag() == stored.get_etag()
+    assert cache.get('v2') is None
+    
+    cache.clear()
+    assert cache.get('v1') is None
+
+
+def test_response_cache_skips_errors_and_expires():
+    """Error responses aren't stored, and entries expire after the TTL."""
+    cache = ResponseCache(ttl=60)
+    cache.put(Response(b'{}', status=500, mimetype='application/json'))
+    assert cache.get() is None
+    
+    expired = ResponseCache(ttl=0)
+    expired.put(Response(b'{}', mimetype='application/json'))
+    assert expired.get() is None
+
+
+def test_single_flight_shares_concurrent_call():
+    """Concurrent calls with the same key run the operation once."""
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def operation():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+    
+    results = []
+    owner = threading.Thread(target=lambda: results.append(flights.run('key', operation)))
+    owner.start()
+    assert started.wait(5)
+    
+    waiter = threading.Thread(target=lambda: results.append(flights.run('key', operation)))
+    waiter.start()
+    # Give the waiter time to join the running call before it finishes
+    time.sleep(0.1)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    
+    assert results == ['result', 'result']
+    assert len(calls) == 1
+    
+    # Nothing is kept once the call finishes
+    assert flights.run('key', lambda: 'again') == 'again'
+
+
+def test_single_flight_propagates_errors():
+    """A failing operation raises for its caller and doesn't stay in flight."""
+    flights = SingleFlight()
+    
+    def failing():
+        raise RuntimeError('boom')
+    
+    with pytest.raises(RuntimeError):
+        flights.run('key', failing)
+    assert flights.run('key', lambda: 'ok') == 'ok'